@@ -0,0 +1,76 @@
+# backup_db.py
+"""
+Consistent snapshot of the SQLite database while the server is running (used by backup_weekly.bat).
+
+- WAL (sqlite_profile.py): آخر commits ممكن تكون لسه في maintenance.db-wal مش في الـ .db
+  -> نسخ ملف الـ .db لوحده (Compress-Archive / copy) مش backup سليم، وممكن يبقى متقطع نص كتابة
+- sqlite3 backup API: نسخة كاملة ومتسقة (فيها الـ WAL) من غير ما نوقف السيرفر،
+  بتقرا على دفعات فالكتابة بتكمل عادي (busy_timeout لو فيه lock)
+- بعد النسخ: PRAGMA quick_check على النسخة -> exit 1 لو فيها مشكلة
+- stdlib بس (مش محتاج الـ venv ولا create_app)
+
+Run:
+    python backup_db.py maintenance.db ..\\backups\\maintenance_2026-01-01.db
+"""
+import os
+import sqlite3
+import sys
+
+PAGES = 1024        # pages per step (writers get the lock between steps)
+BUSY_TIMEOUT = 5000  # ms, same as sqlite_profile
+
+
+def backup(src_path: str, dest_path: str) -> str:
+    """
+    Copy src_path to dest_path with the backup API; returns quick_check's result.
+    dest_path is only replaced when the copy checks "ok".
+    """
+    tmp = dest_path + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+
+    # not mode=ro: a read-only connection can't open a WAL database whose -shm is missing
+    src = sqlite3.connect(src_path, timeout=BUSY_TIMEOUT / 1000)
+    try:
+        dest = sqlite3.connect(tmp)
+        try:
+            src.backup(dest, pages=PAGES)
+            # single file: the snapshot must not depend on a -wal next to it
+            dest.execute("PRAGMA journal_mode = DELETE")
+            result = dest.execute("PRAGMA quick_check").fetchone()[0]
+        finally:
+            dest.close()
+    finally:
+        src.close()
+
+    if result == "ok":
+        os.replace(tmp, dest_path)
+    else:
+        os.remove(tmp)
+    return result
+
+
+def main():
+    if len(sys.argv) != 3:
+        print("usage: python backup_db.py <database> <backup file>")
+        sys.exit(2)
+
+    src_path, dest_path = sys.argv[1], sys.argv[2]
+    if not os.path.exists(src_path):
+        print(f"[ERROR] Database file not found: {src_path}")
+        sys.exit(1)
+
+    try:
+        result = backup(src_path, dest_path)
+    except sqlite3.Error as e:
+        print(f"[ERROR] Backup failed: {e}")
+        sys.exit(1)
+
+    if result != "ok":
+        print(f"[ERROR] Backup copy failed quick_check: {result}")
+        sys.exit(1)
+    print(f"[OK] {src_path} -> {dest_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# bench_print_pdf.py
+"""
+Work-order PDF latency: cold (fonts / images loaded per request) vs warm (pdf_resources cache).
+
+- DB مؤقتة فيها شوية بلاغات
+- cold: pdf_resources.clear() قبل كل طلب = السلوك القديم (TTFont + decode للـ header كل مرة)
+- warm: نفس الطلب والـ cache شغال (cold / warm من غير pdf_cache)
+- cached: reprint لنفس البلاغات من pdf_cache (stamp بس، من غير ReportLab)
+- batch: كل البلاغات في طلب /tickets/print.pdf?ids= واحد (ms لكل صفحة)
+- pool: نفس الـ batch على pdf_pool (لو PDF_POOL_WORKERS > 0 و pypdf متسطب
+  و BENCH_REQUESTS >= PDF_POOL_MIN_BATCH)
+- بيطبع إحصائيات الـ ar() shaping cache
+- لو مفيش زوج خطوط كامل في static/fonts بيستخدم Cairo-Bold.ttf للاتنين
+  عشان الـ TTF parsing يتقاس (BENCH_TTF=0 يلغي ده)
+
+Run:
+    python bench_print_pdf.py
+    set BENCH_REQUESTS=200 && python bench_print_pdf.py
+"""
+import os
+import sys
+import tempfile
+from time import perf_counter
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+REQUESTS = int(os.environ.get("BENCH_REQUESTS", "50"))
+USE_TTF = os.environ.get("BENCH_TTF", "1").strip() != "0"
+DB_PATH = os.path.join(tempfile.gettempdir(), "maintenance_print_bench.db")
+PASSWORD = "print-bench"
+
+
+def _p95(values):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * 0.95))]
+
+
+def main():
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(DB_PATH + suffix):
+            os.remove(DB_PATH + suffix)
+    os.environ.pop("DATABASE_URL", None)
+    os.environ["MAINT_DB_PATH"] = DB_PATH
+
+    from app import create_app
+    from check_query_plans import seed
+    from db import db
+    from models import User
+    import pdf_cache
+    import pdf_resources
+
+    if USE_TTF and pdf_resources.fonts() == pdf_resources.FALLBACK_FONTS:
+        bold = pdf_resources.static_path("fonts", "Cairo-Bold.ttf")
+        if os.path.exists(bold):
+            print("[NOTE] no complete font pair in static/fonts -> Cairo-Bold.ttf for both faces")
+            pdf_resources.FONT_CANDIDATES = (("Cairo", "Cairo-Bold.ttf", "Cairo-Bold.ttf"),)
+
+    app = create_app()
+    if "printing_pdf" not in app.blueprints:
+        print("[FAIL] printing_pdf blueprint not loaded")
+        sys.exit(1)
+
+    with app.app_context():
+        u = User(username="bench_admin", full_name="bench_admin", role="admin", is_active=True)
+        u.set_password(PASSWORD)
+        db.session.add(u)
+        db.session.commit()
+    seed(DB_PATH, max(REQUESTS, 10))
+
+    client = app.test_client()
+    client.post("/login", data={"username": "bench_admin", "password": PASSWORD})
+
+    results = {}
+    pdf_cache.ENABLED = False
+    for mode in ("cold", "warm"):
+        pdf_resources.clear()
+        lat = []
+        for i in range(1, REQUESTS + 1):
+            if mode == "cold":
+                pdf_resources.clear()
+            t0 = perf_counter()
+            res = client.get(f"/tickets/{i}/print.pdf")
+            lat.append((perf_counter() - t0) * 1000)
+            if res.status_code != 200:
+                print(f"[FAIL] /tickets/{i}/print.pdf: HTTP {res.status_code}")
+                sys.exit(1)
+        results[mode] = lat
+
+    pdf_cache.ENABLED = True
+    pdf_cache.CACHE_DIR = os.path.join(tempfile.gettempdir(), "maintenance_print_bench_cache")
+    pdf_cache.clear()
+    for i in range(1, REQUESTS + 1):
+        client.get(f"/tickets/{i}/print.pdf")  # fill
+    lat = []
+    for i in range(1, REQUESTS + 1):
+        t0 = perf_counter()
+        res = client.get(f"/tickets/{i}/print.pdf")
+        lat.append((perf_counter() - t0) * 1000)
+        if res.status_code != 200:
+            print(f"[FAIL] /tickets/{i}/print.pdf (cached): HTTP {res.status_code}")
+            sys.exit(1)
+    results["cached"] = lat
+
+    from blueprints.printing_pdf import ar_stats
+    import pdf_pool
+
+    ids = ",".join(str(i) for i in range(1, REQUESTS + 1))
+    pool_min_batch, pdf_pool.MIN_BATCH = pdf_pool.MIN_BATCH, REQUESTS + 1  # in-process first
+    t0 = perf_counter()
+    res = client.get(f"/tickets/print.pdf?ids={ids}")
+    per_page = (perf_counter() - t0) * 1000 / REQUESTS
+    if res.status_code != 200:
+        print(f"[FAIL] /tickets/print.pdf: HTTP {res.status_code}")
+        sys.exit(1)
+    results["batch"] = [per_page]
+
+    pdf_pool.MIN_BATCH = pool_min_batch
+    if pdf_pool.should_use(REQUESTS):
+        client.get(f"/tickets/print.pdf?ids={ids}")  # spawn + warm the workers
+        t0 = perf_counter()
+        res = client.get(f"/tickets/print.pdf?ids={ids}")
+        if res.status_code != 200:
+            print(f"[FAIL] /tickets/print.pdf (pool): HTTP {res.status_code}")
+            sys.exit(1)
+        results[f"pool x{pdf_pool.WORKERS}"] = [(perf_counter() - t0) * 1000 / REQUESTS]
+
+    print(f"fonts: {pdf_resources.fonts()}  stats: {pdf_resources.stats()}")
+    print(f"ar(): {ar_stats()}")
+    print(f"pdf_cache: {pdf_cache.stats()}")
+    print(f"{'mode':<6} {'avg ms':>9} {'p95 ms':>9}")
+    for mode, lat in results.items():
+        print(f"{mode:<6} {sum(lat) / len(lat):>9.1f} {_p95(lat):>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# bench_search.py
+"""
+Ticket search benchmark: ILIKE '%q%' vs the FTS5 index (ticket_search.py).
+
+- DB مؤقتة بعدد بلاغات كبير (افتراضي 1M) بعناوين/وصف عربي وانجليزي عشوائي
+- بيبني ticket_fts زي migration 7
+- بيفتح /api/dashboard/tickets?q= الحقيقية (admin, all=1) مرة بـ ILIKE ومرة بـ FTS
+- بيطبع متوسط و p95 لكل كلمة بحث + عدد النتايج
+
+Run:
+    python bench_search.py
+    set BENCH_TICKETS=200000 && set BENCH_ROUNDS=10 && python bench_search.py
+"""
+import os
+import sys
+import random
+import sqlite3
+import tempfile
+from time import perf_counter
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+TICKETS = int(os.environ.get("BENCH_TICKETS", "1000000"))
+ROUNDS = int(os.environ.get("BENCH_ROUNDS", "5"))
+DB_PATH = os.path.join(tempfile.gettempdir(), "maintenance_search_bench.db")
+PASSWORD = "search-bench"
+
+WORDS = (
+    "مكيف", "الطوارئ", "تسريب", "مياه", "كهرباء", "إضاءة", "باب", "شباك", "تكييف", "مصعد",
+    "العناية", "المركزة", "سرير", "جهاز", "أشعة", "ضغط", "حرارة", "صيانة", "عطل", "كابل",
+    "leak", "pump", "chiller", "door", "light", "socket", "elevator", "ventilator", "filter", "alarm",
+)
+QUERIES = ("مكيف", "طوارئ", "تسريب مياه", "chill", "elevator alarm", "العنايه المركزه")
+
+
+def _sentence(rnd, n):
+    return " ".join(rnd.choice(WORDS) for _ in range(n))
+
+
+def _words(db_file: str):
+    # نفس seed بتاع check_query_plans وبعدين عناوين/وصف من WORDS
+    rnd = random.Random(7)
+    conn = sqlite3.connect(db_file)
+    try:
+        batch = []
+        for tid in range(1, TICKETS + 1):
+            batch.append((_sentence(rnd, 3), _sentence(rnd, 8), tid))
+            if len(batch) >= 20000:
+                conn.executemany("UPDATE ticket SET title = ?, description = ? WHERE id = ?", batch)
+                batch = []
+        if batch:
+            conn.executemany("UPDATE ticket SET title = ?, description = ? WHERE id = ?", batch)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _p95(values):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * 0.95))]
+
+
+def main():
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(DB_PATH + suffix):
+            os.remove(DB_PATH + suffix)
+    os.environ.pop("DATABASE_URL", None)
+    os.environ["MAINT_DB_PATH"] = DB_PATH
+
+    from app import create_app
+    from check_query_plans import seed
+    from db import db
+    from models import User
+    import ticket_search
+
+    app = create_app()
+    with app.app_context():
+        u = User(username="bench_admin", full_name="bench_admin", role="admin", is_active=True)
+        u.set_password(PASSWORD)
+        db.session.add(u)
+        db.session.commit()
+
+    print(f"[SEED] {TICKETS} tickets -> {DB_PATH}")
+    seed(DB_PATH, TICKETS)
+    _words(DB_PATH)
+
+    t0 = perf_counter()
+    with app.app_context():
+        with db.engine.begin() as conn:
+            indexed = ticket_search.rebuild(conn)
+    print(f"[FTS] indexed {indexed} tickets in {perf_counter() - t0:.1f}s")
+
+    client = app.test_client()
+    client.post("/login", data={"username": "bench_admin", "password": PASSWORD})
+
+    print(f"{'query':<20} {'mode':<6} {'total':>8} {'avg ms':>9} {'p95 ms':>9}")
+    for q in QUERIES:
+        for mode, enabled in (("ilike", False), ("fts", True)):
+            ticket_search.ENABLED = enabled
+            lat, total = [], None
+            for _ in range(ROUNDS):
+                t0 = perf_counter()
+                res = client.get("/api/dashboard/tickets", query_string={"q": q, "view": "all", "all": "1"})
+                lat.append((perf_counter() - t0) * 1000)
+                if res.status_code != 200:
+                    print(f"[FAIL] {q} {mode}: HTTP {res.status_code}")
+                    sys.exit(1)
+                total = res.get_json()["total"]
+            print(f"{q:<20} {mode:<6} {total:>8} {sum(lat) / len(lat):>9.1f} {_p95(lat):>9.1f}")
+    ticket_search.ENABLED = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# bench_sqlite_profile.py
+"""
+Mixed read/write benchmark: default SQLite settings vs sqlite_profile.
+
+- DB مؤقتة بعدد بلاغات (افتراضي 50k) لكل profile
+- readers: queries زي الـ dashboard (count + آخر 200 بلاغ)
+- writers: تغيير status + إنشاء بلاغ (زي tickets routes)
+- بيطبع reads/s و writes/s و p95 و عدد أخطاء "database is locked"
+
+Run:
+    python bench_sqlite_profile.py
+    set BENCH_SECONDS=20 && set BENCH_READERS=16 && python bench_sqlite_profile.py
+"""
+import os
+import sys
+import random
+import tempfile
+import threading
+from datetime import datetime
+from time import perf_counter
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+TICKETS = int(os.environ.get("BENCH_TICKETS", "50000"))
+SECONDS = float(os.environ.get("BENCH_SECONDS", "10"))
+READERS = int(os.environ.get("BENCH_READERS", "8"))
+WRITERS = int(os.environ.get("BENCH_WRITERS", "2"))
+
+READ_SQL = (
+    "SELECT count(id) FROM ticket WHERE status != 'closed'",
+    "SELECT id, ticket_no, status, title, created_at FROM ticket "
+    "WHERE status != 'closed' ORDER BY created_at DESC LIMIT 200",
+)
+
+
+def _prepare(db_file: str):
+    from sqlalchemy import create_engine
+    from check_query_plans import seed
+    from models import Ticket
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_file + suffix):
+            os.remove(db_file + suffix)
+
+    engine = create_engine("sqlite:///" + db_file)
+    Ticket.metadata.create_all(engine)
+    engine.dispose()
+    seed(db_file, TICKETS)
+
+
+def _run(name: str, db_file: str, profile):
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.exc import OperationalError
+    import sqlite_profile
+
+    _prepare(db_file)
+    engine = create_engine("sqlite:///" + db_file, pool_size=READERS + WRITERS, max_overflow=0)
+    if profile:
+        sqlite_profile.install(engine, profile)
+
+    deadline = perf_counter() + SECONDS
+    lock = threading.Lock()
+    stats = {"reads": 0, "writes": 0, "errors": 0, "read_ms": []}
+
+    def reader():
+        done, errors, lat = 0, 0, []
+        with engine.connect() as conn:
+            while perf_counter() < deadline:
+                t0 = perf_counter()
+                try:
+                    for sql in READ_SQL:
+                        conn.execute(text(sql)).fetchall()
+                    conn.rollback()
+                    done += 1
+                    lat.append((perf_counter() - t0) * 1000)
+                except OperationalError:
+                    conn.rollback()
+                    errors += 1
+        with lock:
+            stats["reads"] += done
+            stats["errors"] += errors
+            stats["read_ms"].extend(lat)
+
+    def writer(seed_no):
+        rnd = random.Random(seed_no)
+        done, errors = 0, 0
+        while perf_counter() < deadline:
+            now = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S.%f")
+            try:
+                with engine.begin() as conn:
+                    conn.execute(
+                        text("UPDATE ticket SET status = :st, updated_at = :now WHERE id = :id"),
+                        {"st": rnd.choice(("processing", "waiting", "executed")), "now": now,
+                         "id": rnd.randint(1, TICKETS)},
+                    )
+                    conn.execute(
+                        text("""INSERT INTO ticket (ticket_no, requester_user_id, requester_name,
+                                    building_id, floor_id, section_id, room_id, maintenance_dept,
+                                    priority, title, description, status, created_at, updated_at)
+                                VALUES ((SELECT max(ticket_no) + 1 FROM ticket), 1, 'bench', 1, 1, 1, 1,
+                                        'hvac', 'high', 'bench', 'bench', 'new', :now, :now)"""),
+                        {"now": now},
+                    )
+                done += 1
+            except OperationalError:
+                errors += 1
+        with lock:
+            stats["writes"] += done
+            stats["errors"] += errors
+
+    threads = [threading.Thread(target=reader) for _ in range(READERS)]
+    threads += [threading.Thread(target=writer, args=(i,)) for i in range(WRITERS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    with engine.connect() as conn:
+        mode = conn.execute(text("PRAGMA journal_mode")).scalar()
+    engine.dispose()
+
+    lat = sorted(stats["read_ms"]) or [0.0]
+    p95 = lat[min(len(lat) - 1, int(len(lat) * 0.95))]
+    print(f"[{name:<7}] journal={mode:<6} reads/s={stats['reads'] / SECONDS:8.1f} "
+          f"writes/s={stats['writes'] / SECONDS:7.1f} read p95={p95:7.1f}ms errors={stats['errors']}")
+
+
+def main():
+    import sqlite_profile
+
+    db_file = os.path.join(tempfile.gettempdir(), "maintenance_sqlite_bench.db")
+    print(f"[BENCH] {TICKETS} tickets, {READERS} readers + {WRITERS} writers, {SECONDS:g}s each")
+
+    _run("default", db_file, None)
+    _run("profile", db_file, sqlite_profile.build_profile(db_file))
+
+
+if __name__ == "__main__":
+    main()
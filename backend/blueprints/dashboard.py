@@ -1,15 +1,24 @@
+import json
+import os
+import threading
+from collections import deque
 from datetime import datetime, date, time, timedelta
-from math import ceil
+from hashlib import sha1
+from queue import Queue, Empty, Full
+from time import monotonic
 from urllib.parse import urlencode
 
-from flask import Blueprint, render_template, request, jsonify
+from flask import Blueprint, render_template, request, jsonify, Response
 from flask_login import login_required, current_user
-from sqlalchemy import func, or_
+from sqlalchemy import func, or_, and_
+from werkzeug.http import quote_etag
 
 from models import (
-    Ticket, Building, Floor, HospitalSection, Room,
+    Ticket,
     MAINT_DEPTS, STATUSES, SLA_HOURS
 )
+import location_registry
+import ticket_search
 
 bp = Blueprint("dashboard", __name__)
 
@@ -44,6 +53,143 @@ def _compute_over_sla(t: Ticket, now: datetime) -> bool:
     return elapsed.total_seconds() > (hours * 3600)
 
 
+# counts stop at COUNT_CAP ("10000+"): deep history costs the same as today
+COUNT_CAP = int(os.environ.get("DASHBOARD_COUNT_CAP", "10000"))
+
+
+def _count(query, cap=None) -> int:
+    # count(id) lets SQLite answer from a covering index (Query.count() wraps SELECT *)
+    query = query.order_by(None)
+    if not cap:
+        return query.with_entities(func.count(Ticket.id)).scalar() or 0
+    sub = query.with_entities(Ticket.id).limit(cap + 1).subquery()
+    return query.session.query(func.count()).select_from(sub).scalar() or 0
+
+
+def _count_label(n: int, cap=COUNT_CAP) -> str:
+    return f"{cap}+" if cap and n > cap else str(n)
+
+
+def _encode_cursor(t: Ticket) -> str:
+    # keyset position on (created_at, id)
+    return f"{t.created_at.strftime('%Y%m%d%H%M%S%f')}-{t.id}"
+
+
+def _decode_cursor(value: str):
+    try:
+        ts, tid = (value or "").split("-")
+        return datetime.strptime(ts, "%Y%m%d%H%M%S%f"), int(tid)
+    except Exception:
+        return None
+
+
+def _older_than(query, cursor):
+    c_at, c_id = cursor
+    # created_at range first -> index friendly
+    return query.filter(Ticket.created_at <= c_at, or_(Ticket.created_at < c_at, Ticket.id < c_id))
+
+
+def _newer_than(query, cursor):
+    c_at, c_id = cursor
+    return query.filter(Ticket.created_at >= c_at, or_(Ticket.created_at > c_at, Ticket.id > c_id))
+
+
+def _over_sla_filter(query, now: datetime):
+    # same rule as _compute_over_sla, on the indexed sla_due_at column
+    return query.filter(
+        Ticket.status != "closed",
+        Ticket.sla_due_at != None,
+        or_(
+            and_(Ticket.ended_at == None, Ticket.sla_due_at < now),
+            Ticket.ended_at > Ticket.sla_due_at,
+        ),
+    )
+
+
+def _dashboard_etag() -> str:
+    """
+    Cheap change token for the dashboard JSON: any ticket write bumps
+    max(updated_at) / max(id) (both single index lookups), plus the location
+    registry version, the viewer's dept lock, the query string and the current
+    minute (durations / NEW / SLA flags are minute-based).
+    """
+    max_updated = Ticket.query.with_entities(func.max(Ticket.updated_at)).scalar()
+    max_id = Ticket.query.with_entities(func.max(Ticket.id)).scalar()
+
+    parts = [
+        str(max_updated),
+        str(max_id),
+        str(location_registry.version()),
+        current_user.role or "",
+        (current_user.maintenance_dept or "").lower(),
+        urlencode(sorted(request.args.items(multi=True))),
+        datetime.utcnow().strftime("%Y%m%d%H%M"),
+    ]
+    return sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def _dept_scope():
+    """(selected_dept, dept_locked) for the current user / request."""
+    selected_dept = (request.args.get("dept", "") or "").strip().lower()
+    dept_locked = False
+    if current_user.role in ("technician", "requester"):
+        if current_user.maintenance_dept:
+            selected_dept = current_user.maintenance_dept.lower()
+        else:
+            selected_dept = ""
+        dept_locked = True
+
+    if selected_dept and selected_dept not in [d.lower() for d in MAINT_DEPTS]:
+        selected_dept = ""
+    return selected_dept, dept_locked
+
+
+def _ticket_item(t: Ticket, now: datetime) -> dict:
+    """One dashboard row (JSON-able)."""
+    over_sla = (t.status != "closed") and _compute_over_sla(t, now)
+
+    created_at = t.created_at or now
+    age_minutes = int(max(0, (now - created_at).total_seconds() // 60))
+    is_new = (age_minutes <= 15)
+
+    if t.started_at and t.ended_at:
+        duration_text = _fmt_duration(t.ended_at - t.started_at)
+    elif t.started_at and not t.ended_at:
+        duration_text = _fmt_duration(now - t.started_at)
+    else:
+        duration_text = _fmt_duration(now - created_at)
+
+    started_hm = t.started_at.strftime("%H:%M") if t.started_at else None
+    ended_hm = t.ended_at.strftime("%H:%M") if t.ended_at else None
+    started_full = t.started_at.strftime("%Y-%m-%d %H:%M") if t.started_at else None
+    ended_full = t.ended_at.strftime("%Y-%m-%d %H:%M") if t.ended_at else None
+
+    can_close = (t.status in ("executed", "cancelled"))
+
+    return {
+        "id": t.id,
+        "ticket_no": t.ticket_no,
+        "caller": t.requester_name,
+        "dept": (t.maintenance_dept or "").upper(),
+        "priority": t.priority,
+        "error_name": t.error_name,
+        "status": t.status,
+        "title": t.title,
+        # ✅ stored on the ticket (rows inserted outside the app -> registry)
+        "location": t.location_path or location_registry.path(t.building_id, t.floor_id, t.section_id, t.room_id) or "-",
+        "created_date": created_at.date().isoformat(),
+        "started_hm": started_hm,
+        "ended_hm": ended_hm,
+        "started_full": started_full,
+        "ended_full": ended_full,
+        "duration_text": duration_text,
+        "over_sla": over_sla,
+        "is_new": is_new,
+        "age_minutes": age_minutes,
+        "can_close": can_close,
+    }
+
+
 def _build_query():
     today = date.today()
     now = datetime.utcnow()
@@ -58,35 +204,35 @@ def _build_query():
     dt_from = datetime.combine(date_from, time.min)
     dt_to = datetime.combine(date_to, time.max)
 
-    selected_dept = (request.args.get("dept", "") or "").strip().lower()
-    dept_locked = False
-    if current_user.role in ("technician", "requester"):
-        if current_user.maintenance_dept:
-            selected_dept = current_user.maintenance_dept.lower()
-        else:
-            selected_dept = ""
-        dept_locked = True
-
+    selected_dept, dept_locked = _dept_scope()
     valid_depts = [d.lower() for d in MAINT_DEPTS]
-    if selected_dept and selected_dept not in valid_depts:
-        selected_dept = ""
 
     q = (request.args.get("q", "") or "").strip()
 
     per_page = request.args.get("per", type=int) or 200
     per_page = max(20, min(per_page, 2000))
-    page = request.args.get("page", type=int) or 1
-    page = max(1, page)
+    after = _decode_cursor(request.args.get("after", ""))
+    before = None if after else _decode_cursor(request.args.get("before", ""))
 
     base_q = Ticket.query
 
     if selected_dept:
-        base_q = base_q.filter(func.lower(Ticket.maintenance_dept) == selected_dept)
+        base_q = base_q.filter(Ticket.maintenance_dept == selected_dept)
 
     if not show_all:
         base_q = base_q.filter(Ticket.created_at >= dt_from, Ticket.created_at <= dt_to)
 
-    if q:
+    fts_ids = None
+    if q and ticket_search.available(base_q.session.get_bind()):
+        fts_ids = ticket_search.ids_subquery(q)
+
+    if fts_ids is not None:
+        # ✅ FTS5 index (ticket fields + location_path) -> no joins / no full scan
+        cond = Ticket.id.in_(fts_ids)
+        if q.isdigit():
+            cond = or_(Ticket.ticket_no == int(q), cond)
+        base_q = base_q.filter(cond)
+    elif q:
         terms = []
         if q.isdigit():
             terms.append(Ticket.ticket_no == int(q))
@@ -95,18 +241,9 @@ def _build_query():
         terms.append(Ticket.title.ilike(like))
         terms.append(Ticket.description.ilike(like))
         terms.append(Ticket.error_name.ilike(like))
+        terms.append(Ticket.location_path.ilike(like))  # no location joins
 
-        base_q = base_q.outerjoin(Building, Building.id == Ticket.building_id)\
-                       .outerjoin(Floor, Floor.id == Ticket.floor_id)\
-                       .outerjoin(HospitalSection, HospitalSection.id == Ticket.section_id)\
-                       .outerjoin(Room, Room.id == Ticket.room_id)\
-                       .filter(or_(
-                           *terms,
-                           Building.name.ilike(like),
-                           Floor.name.ilike(like),
-                           HospitalSection.name.ilike(like),
-                           Room.name.ilike(like),
-                       ))
+        base_q = base_q.filter(or_(*terms))
 
     all_q = base_q
     open_q = all_q.filter(Ticket.status != "closed")
@@ -116,99 +253,62 @@ def _build_query():
         Ticket.closed_at <= datetime.combine(today, time.max),
     )
 
-    # Over SLA scan (cap)
-    over_sla_ids = []
-    scan_rows = all_q.order_by(Ticket.created_at.desc()).limit(5000).all()
-    for t in scan_rows:
-        if t.status == "closed":
-            continue
-        if _compute_over_sla(t, now):
-            over_sla_ids.append(t.id)
+    over_sla_q = _over_sla_filter(all_q, now)
 
-    over_sla_total = len(over_sla_ids)
-    open_total = open_q.count()
-    closed_today_total = closed_today_q.count()
-    all_total = all_q.count()
+    over_sla_total = _count(over_sla_q, COUNT_CAP)
+    open_total = _count(open_q, COUNT_CAP)
+    closed_today_total = _count(closed_today_q, COUNT_CAP)
+    all_total = _count(all_q, COUNT_CAP)
 
     if view == "open":
         final_q = open_q
     elif view == "closed_today":
         final_q = closed_today_q
     elif view == "over_sla":
-        final_q = all_q.filter(Ticket.id.in_(over_sla_ids)) if over_sla_ids else all_q.filter(Ticket.id == -1)
+        final_q = over_sla_q
     else:
         final_q = all_q
 
-    final_q = final_q.order_by(Ticket.created_at.desc())
-
-    total = final_q.count()
-    total_pages = max(1, ceil(total / per_page)) if total else 1
-    if page > total_pages:
-        page = total_pages
-
-    rows = final_q.offset((page - 1) * per_page).limit(per_page).all()
-
-    # maps
-    building_map = {b.id: b.name for b in Building.query.all()}
-    floor_map = {f.id: f.name for f in Floor.query.all()}
-    section_map = {s.id: s.name for s in HospitalSection.query.all()}
-    room_map = {r.id: r.name for r in Room.query.all()}
+    total = {
+        "open": open_total, "closed_today": closed_today_total,
+        "over_sla": over_sla_total, "all": all_total,
+    }[view]
+
+    # ✅ keyset pagination on (created_at, id): every page costs the same as the first
+    rows = None
+    has_prev = False
+    if before:
+        rows = _newer_than(final_q, before)\
+            .order_by(Ticket.created_at.asc(), Ticket.id.asc())\
+            .limit(per_page + 1).all()
+        if len(rows) > per_page:
+            has_prev = True
+            rows = rows[:per_page][::-1]
+            has_next = True
+        else:
+            rows = None  # reached the newest tickets -> first page
 
-    items = []
-    for t in rows:
-        over_sla = (t.status != "closed") and _compute_over_sla(t, now)
+    if rows is None:
+        page_q = _older_than(final_q, after) if after else final_q
+        rows = page_q.order_by(Ticket.created_at.desc(), Ticket.id.desc()).limit(per_page + 1).all()
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+        has_prev = after is not None
 
-        created_at = t.created_at or now
-        age_minutes = int(max(0, (now - created_at).total_seconds() // 60))
-        is_new = (age_minutes <= 15)
+    next_cursor = _encode_cursor(rows[-1]) if has_next and rows else None
+    prev_cursor = _encode_cursor(rows[0]) if has_prev and rows else None
 
-        if t.started_at and t.ended_at:
-            duration_text = _fmt_duration(t.ended_at - t.started_at)
-        elif t.started_at and not t.ended_at:
-            duration_text = _fmt_duration(now - t.started_at)
-        else:
-            duration_text = _fmt_duration(now - created_at)
-
-        started_hm = t.started_at.strftime("%H:%M") if t.started_at else None
-        ended_hm = t.ended_at.strftime("%H:%M") if t.ended_at else None
-        started_full = t.started_at.strftime("%Y-%m-%d %H:%M") if t.started_at else None
-        ended_full = t.ended_at.strftime("%Y-%m-%d %H:%M") if t.ended_at else None
-
-        can_close = (t.status in ("executed", "cancelled"))
-
-        items.append({
-            "id": t.id,
-            "ticket_no": t.ticket_no,
-            "caller": t.requester_name,
-            "dept": (t.maintenance_dept or "").upper(),
-            "priority": t.priority,
-            "error_name": t.error_name,
-            "status": t.status,
-            "title": t.title,
-            "building": building_map.get(t.building_id, "-"),
-            "floor": floor_map.get(t.floor_id, "-"),
-            "section": section_map.get(t.section_id, "-"),
-            "room": room_map.get(t.room_id, "-"),
-            "started_hm": started_hm,
-            "ended_hm": ended_hm,
-            "started_full": started_full,
-            "ended_full": ended_full,
-            "duration_text": duration_text,
-            "over_sla": over_sla,
-            "is_new": is_new,
-            "age_minutes": age_minutes,
-            "can_close": can_close,
-        })
+    items = [_ticket_item(t, now) for t in rows]
 
     status_choices = [(s, s) for s in STATUSES if s != "closed"]
 
     args = dict(request.args)
-    args.pop("page", None)
+    for k in ("page", "after", "before"):
+        args.pop(k, None)
     qs_no_page = urlencode(args, doseq=True)
 
-    args_keep = dict(request.args)
+    args_keep = dict(args)
     args_keep.pop("view", None)
-    args_keep.pop("page", None)
     qs_keep = urlencode(args_keep, doseq=True)
 
     ctx = dict(
@@ -225,17 +325,19 @@ def _build_query():
         dept_locked=dept_locked,
 
         per_page=per_page,
-        page=page,
         total=total,
-        total_pages=total_pages,
-        has_prev=(page > 1),
-        has_next=(page < total_pages),
+        total_label=_count_label(total),
+        total_capped=total > COUNT_CAP,
+        has_prev=has_prev,
+        has_next=has_next,
+        prev_cursor=prev_cursor,
+        next_cursor=next_cursor,
         qs_no_page=qs_no_page,
 
-        open_total=open_total,
-        over_sla_total=over_sla_total,
-        closed_today_total=closed_today_total,
-        all_total=all_total,
+        open_total=_count_label(open_total),
+        over_sla_total=_count_label(over_sla_total),
+        closed_today_total=_count_label(closed_today_total),
+        all_total=_count_label(all_total),
         qs_keep=qs_keep,
 
         recent_tickets=items,
@@ -248,17 +350,146 @@ def _build_query():
 @bp.route("/dashboard")
 @login_required
 def dashboard():
+    etag = _dashboard_etag()
     ctx = _build_query()
-    return render_template("dashboard.html", **ctx)
+    return render_template("dashboard.html", etag=quote_etag(etag), **ctx)
 
 
 @bp.get("/api/dashboard/tickets")
 @login_required
 def api_dashboard_tickets():
+    # ✅ 304 before any heavy work when nothing changed since the last poll
+    etag = _dashboard_etag()
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+        resp.set_etag(etag)
+        return resp
+
     ctx = _build_query()
-    return jsonify({
-        "total": ctx["total"],
-        "page": ctx["page"],
-        "total_pages": ctx["total_pages"],
+    resp = jsonify({
+        "total": min(ctx["total"], COUNT_CAP),
+        "total_capped": ctx["total_capped"],
+        "next_cursor": ctx["next_cursor"],
+        "prev_cursor": ctx["prev_cursor"],
         "items": ctx["recent_tickets"],
     })
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
+
+# =========================
+# ✅ Live updates (SSE)
+# =========================
+# بدل ما كل شاشة تعمل poll كل 15 ثانية: كل تعديل على بلاغ بيتبعت كـ event صغير
+# (created / status_changed / closed) والشاشة بتعدل الصف مكانه.
+# - فلترة الـ dept على السيرفر
+# - per-process: كل worker بيبعت تعديلاته هو بس، والـ ETag poll (كل دقيقة) يغطي الباقي
+# - Last-Event-ID: إعادة إرسال اللي فات من الـ backlog بعد reconnect
+STREAM_KEEPALIVE = 15   # seconds between ": ping" comments
+STREAM_MAX_AGE = int(os.environ.get("DASHBOARD_STREAM_MAX_AGE", "300"))  # seconds, then browser reconnects
+STREAM_BACKLOG = 500
+STREAM_QUEUE_MAX = 1000
+
+_stream_lock = threading.Lock()
+_stream_seq = 0
+_stream_backlog = deque(maxlen=STREAM_BACKLOG)  # (seq, dept, data)
+_stream_subscribers = set()
+
+
+class _StreamSub:
+    __slots__ = ("dept", "queue")
+
+    def __init__(self, dept: str):
+        self.dept = dept
+        self.queue = Queue(maxsize=STREAM_QUEUE_MAX)
+
+    def push(self, ev):
+        try:
+            self.queue.put_nowait(ev)
+        except Full:
+            # client too slow: drop what is queued and ask it to reload
+            with self.queue.mutex:
+                self.queue.queue.clear()
+            self.queue.put_nowait(None)
+
+
+def publish_ticket_event(kind: str, *tickets):
+    """
+    Push one event per ticket to the live dashboards.
+    kind: "created" | "status_changed" | "closed". Call after commit.
+    """
+    global _stream_seq
+
+    tickets = [t for t in tickets if t is not None]
+    if not tickets:
+        return
+    if len(tickets) > 1:
+        # refresh the expired (post-commit) instances in one query
+        Ticket.query.filter(Ticket.id.in_([t.id for t in tickets])).all()
+
+    now = datetime.utcnow()
+    payloads = [
+        ((t.maintenance_dept or "").lower(),
+         json.dumps({"type": kind, "ticket": _ticket_item(t, now)}, ensure_ascii=False))
+        for t in tickets
+    ]
+
+    with _stream_lock:
+        for dept, data in payloads:
+            _stream_seq += 1
+            ev = (_stream_seq, dept, data)
+            _stream_backlog.append(ev)
+            for sub in _stream_subscribers:
+                if not sub.dept or sub.dept == dept:
+                    sub.push(ev)
+
+
+def _stream_subscribe(dept: str, last_id):
+    sub = _StreamSub(dept)
+    with _stream_lock:
+        if last_id is not None:
+            oldest = _stream_backlog[0][0] if _stream_backlog else _stream_seq + 1
+            if last_id > _stream_seq or last_id + 1 < oldest:
+                sub.push(None)  # restarted / gap -> full reload
+            else:
+                for ev in _stream_backlog:
+                    if ev[0] > last_id and (not dept or ev[1] == dept):
+                        sub.push(ev)
+        _stream_subscribers.add(sub)
+    return sub
+
+
+def _stream_unsubscribe(sub):
+    with _stream_lock:
+        _stream_subscribers.discard(sub)
+
+
+@bp.get("/api/dashboard/stream")
+@login_required
+def api_dashboard_stream():
+    selected_dept, _ = _dept_scope()
+    sub = _stream_subscribe(selected_dept, request.headers.get("Last-Event-ID", type=int))
+
+    def gen():
+        started = monotonic()
+        try:
+            yield "retry: 3000\n\n"
+            while monotonic() - started < STREAM_MAX_AGE:
+                try:
+                    ev = sub.queue.get(timeout=STREAM_KEEPALIVE)
+                except Empty:
+                    yield ": ping\n\n"
+                    continue
+                if ev is None:
+                    yield "event: reset\ndata: {}\n\n"
+                    continue
+                seq, _, data = ev
+                yield f"id: {seq}\nevent: ticket\ndata: {data}\n\n"
+        finally:
+            _stream_unsubscribe(sub)
+
+    resp = Response(gen(), mimetype="text/event-stream")
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.headers["X-Accel-Buffering"] = "no"
+    return resp
@@ -1,14 +1,23 @@
 # blueprints/kpi.py
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
 from datetime import datetime, date, time, timedelta
-from io import BytesIO
+from time import monotonic
 
-from flask import Blueprint, render_template, request, send_file
+from flask import Blueprint, render_template, request, send_file, jsonify, abort
 from flask_login import login_required, current_user
-from sqlalchemy import func
+from sqlalchemy import func, case, and_, or_, select, insert, literal, union_all, cast, Date
 
-from models import db, Ticket, Building, MAINT_DEPTS
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Counter, Ticket, KpiDailyRollup, KpiRollupState, MAINT_DEPTS
+import location_registry
 
 bp = Blueprint("kpi", __name__)
+log = logging.getLogger(__name__)
 
 # ✅ SLA hours (as provided)
 # Urgent: 6h, High: 16h, Medium: 24h, Low: 48h
@@ -69,182 +78,518 @@ def _dept_scope(base_query, dept: str):
     return base_query
 
 
-def _aging_buckets_for_open(open_now_q, now_utc: datetime):
-    bucket_0_24 = bucket_1_3 = bucket_4_7 = bucket_7_plus = 0
+def _sla_hours_case():
+    """
+    SQL CASE mirroring _normalize_priority + SLA_HOURS (NULL = unknown priority).
+    """
+    p = func.lower(func.trim(Ticket.priority))
+    return case(
+        (p.like("%urgent%"), SLA_HOURS["urgent"]),
+        (p.like("%emergency%"), SLA_HOURS["emergency"]),
+        (p.like("%high%"), SLA_HOURS["high"]),
+        (p.like("%medium%"), SLA_HOURS["medium"]),
+        (p.like("%low%"), SLA_HOURS["low"]),
+        else_=None,
+    )
+
+
+def _is_sqlite() -> bool:
+    return db.engine.dialect.name == "sqlite"
+
+
+def _duration_ms(start_col, end_col):
+    # rounded to ms so exact-hour closes compare equal (julianday is a float)
+    if _is_sqlite():
+        return func.round((func.julianday(end_col) - func.julianday(start_col)) * 86400000.0)
+    return func.round(func.extract("epoch", end_col - start_col) * 1000.0)
 
-    for (c_at,) in open_now_q.with_entities(Ticket.created_at).all():
-        if not c_at:
-            continue
-        hours = (now_utc - c_at).total_seconds() / 3600.0
-        if hours <= 24:
-            bucket_0_24 += 1
-        elif hours <= 72:
-            bucket_1_3 += 1
-        elif hours <= 168:
-            bucket_4_7 += 1
-        else:
-            bucket_7_plus += 1
 
-    return [
-        ("0-24 hours", bucket_0_24),
-        ("1-3 days", bucket_1_3),
-        ("4-7 days", bucket_4_7),
-        ("> 7 days", bucket_7_plus),
-    ], bucket_7_plus
+def _day(col):
+    # SQLite: 'YYYY-MM-DD' text, others: DATE
+    return func.date(col) if _is_sqlite() else cast(col, Date)
 
 
-def _sla_eval_for_query(created_q):
+def _aging_bucket_case(now_utc: datetime):
     """
-    SLA Compliance for tickets CREATED in range.
-    Returns:
-      met, breached, pending, unknown, rate, per_priority_rows
+    0: 0-24h, 1: 1-3 days, 2: 4-7 days, 3: > 7 days  (hours <= N  <=>  created_at >= now - N)
     """
-    sla_met = sla_breached = sla_pending = sla_unknown = 0
+    return case(
+        (Ticket.created_at >= now_utc - timedelta(hours=24), 0),
+        (Ticket.created_at >= now_utc - timedelta(hours=72), 1),
+        (Ticket.created_at >= now_utc - timedelta(hours=168), 2),
+        else_=3,
+    )
+
 
-    per = {
-        "urgent": {"met": 0, "breached": 0, "pending": 0, "unknown": 0},
-        "emergency": {"met": 0, "breached": 0, "pending": 0, "unknown": 0},
-        "high": {"met": 0, "breached": 0, "pending": 0, "unknown": 0},
-        "medium": {"met": 0, "breached": 0, "pending": 0, "unknown": 0},
-        "low": {"met": 0, "breached": 0, "pending": 0, "unknown": 0},
+def _new_stats():
+    return {
+        "created": 0, "open_in_range": 0, "closed": 0, "close_hours": 0.0, "close_n": 0,
+        "backlog": 0, "aging": [0, 0, 0, 0],
+        "sla_met": 0, "sla_breached": 0, "sla_pending": 0, "sla_unknown": 0,
     }
 
-    rows = created_q.with_entities(Ticket.priority, Ticket.created_at, Ticket.closed_at, Ticket.status).all()
-    for pr, c_at, cl_at, st in rows:
-        pr_key = _normalize_priority(pr)
-        sla_h = _get_sla_hours(pr)
 
-        if pr_key not in per:
-            sla_unknown += 1
+def _new_acc():
+    return {
+        "per_dept": {},
+        "per_priority": {k: {"met": 0, "breached": 0, "pending": 0, "unknown": 0}
+                         for k in ("urgent", "emergency", "high", "medium", "low")},
+        "status": {},
+        "priority": {},
+        "building": {},
+        "trend": {},
+    }
+
+
+def _acc_dept(acc, dept):
+    per_dept = acc["per_dept"]
+    if dept not in per_dept:
+        per_dept[dept] = _new_stats()
+    return per_dept[dept]
+
+
+def _sla_rate(met: int, breached: int):
+    scored = met + breached
+    return round((met / scored) * 100.0, 2) if scored else None
+
+
+def _acc_created(acc, rows):
+    """
+    rows: (dept, status, priority, count, sla_met, sla_breached) for tickets CREATED in range
+    """
+    for dept, st, pr, n, met, br in rows:
+        if not n:
             continue
+        s = _acc_dept(acc, dept)
+        s["created"] += n
+        if st != "closed":
+            s["open_in_range"] += n
+
+        acc["status"][st] = acc["status"].get(st, 0) + n
+        acc["priority"][pr] = acc["priority"].get(pr, 0) + n
 
-        if sla_h is None or not c_at:
-            per[pr_key]["unknown"] += 1
-            sla_unknown += 1
+        pr_key = _normalize_priority(pr)
+        if pr_key not in acc["per_priority"]:
+            s["sla_unknown"] += n
             continue
 
-        if (st or "").lower() != "closed" or cl_at is None:
-            sla_pending += 1
-            per[pr_key]["pending"] += 1
+        met = met or 0
+        br = br or 0
+        pend = n - met - br
+        s["sla_met"] += met
+        s["sla_breached"] += br
+        s["sla_pending"] += pend
+        acc["per_priority"][pr_key]["met"] += met
+        acc["per_priority"][pr_key]["breached"] += br
+        acc["per_priority"][pr_key]["pending"] += pend
+
+
+def _acc_closed(acc, rows):
+    """
+    rows: (dept, count, sum of close hours) for tickets CLOSED in range
+    """
+    for dept, n, hours in rows:
+        if not n:
             continue
+        s = _acc_dept(acc, dept)
+        s["closed"] += n
+        s["close_hours"] += float(hours or 0)
+        s["close_n"] += n
+
+
+def _acc_counts(target: dict, rows):
+    for key, n in rows:
+        if n:
+            target[key] = target.get(key, 0) + n
+
+
+def _acc_buildings(acc, rows):
+    # rows: (building_id, count) -> counted by building name from the registry
+    _acc_counts(acc["building"], ((location_registry.name("building", b_id), n) for b_id, n in rows))
+
+
+def _created_sla_columns():
+    sla_ms = _sla_hours_case() * 3600000
+    is_closed = and_(func.lower(Ticket.status) == "closed", Ticket.closed_at != None)
+    dur_ms = _duration_ms(Ticket.created_at, Ticket.closed_at)
+    met = case((and_(is_closed, dur_ms <= sla_ms), 1), else_=0)
+    breached = case((and_(is_closed, dur_ms > sla_ms), 1), else_=0)
+    return met, breached
+
+
+def _close_hours_column():
+    return _duration_ms(Ticket.created_at, Ticket.closed_at) / 3600000.0
+
+
+def _raw_aggregate(acc, scope, start_dt: datetime, end_dt: datetime, trend_from, trend_to):
+    """
+    Created / closed / building / trend straight from the ticket table.
+    """
+    met, breached = _created_sla_columns()
+    created_q = scope.filter(Ticket.created_at >= start_dt, Ticket.created_at <= end_dt)
+
+    _acc_created(acc, (
+        created_q.with_entities(
+            Ticket.maintenance_dept,
+            Ticket.status,
+            Ticket.priority,
+            func.count(Ticket.id),
+            func.sum(met),
+            func.sum(breached),
+        )
+        .group_by(Ticket.maintenance_dept, Ticket.status, Ticket.priority)
+        .all()
+    ))
+
+    _acc_closed(acc, (
+        scope.filter(
+            Ticket.status == "closed",
+            Ticket.closed_at != None,
+            Ticket.closed_at >= start_dt,
+            Ticket.closed_at <= end_dt
+        )
+        .with_entities(Ticket.maintenance_dept, func.count(Ticket.id), func.sum(_close_hours_column()))
+        .group_by(Ticket.maintenance_dept)
+        .all()
+    ))
+
+    _acc_buildings(acc, (
+        created_q.with_entities(Ticket.building_id, func.count(Ticket.id))
+                 .group_by(Ticket.building_id)
+                 .all()
+    ))
+
+    if trend_from and trend_to and trend_from <= trend_to:
+        t_start_dt, t_end_dt = _dt_range(trend_from, trend_to)
+        day = _day(Ticket.created_at)
+        _acc_counts(acc["trend"], (
+            (str(d), n)
+            for d, n in scope.filter(Ticket.created_at >= t_start_dt, Ticket.created_at <= t_end_dt)
+                             .with_entities(day, func.count(Ticket.id))
+                             .group_by(day)
+                             .all()
+        ))
+
+
+def _acc_open_now(acc, scope, now_utc: datetime):
+    bucket = _aging_bucket_case(now_utc)
+    open_rows = (
+        scope.filter(Ticket.status != "closed")
+             .with_entities(Ticket.maintenance_dept, bucket, func.count(Ticket.id))
+             .group_by(Ticket.maintenance_dept, bucket)
+             .all()
+    )
+    for dept, b, n in open_rows:
+        s = _acc_dept(acc, dept)
+        s["backlog"] += n
+        s["aging"][b] += n
+
 
-        duration_h = (cl_at - c_at).total_seconds() / 3600.0
-        if duration_h <= sla_h:
-            sla_met += 1
-            per[pr_key]["met"] += 1
+# -------------------------
+# Daily rollup (kpi_daily_rollup): closed days are answered from here
+# -------------------------
+def _day_spans(days):
+    """
+    Sorted days -> contiguous (first, last) spans.
+    """
+    spans = []
+    for d in sorted(days):
+        if spans and d == spans[-1][1] + timedelta(days=1):
+            spans[-1][1] = d
         else:
-            sla_breached += 1
-            per[pr_key]["breached"] += 1
+            spans.append([d, d])
+    return spans
 
-    scored = sla_met + sla_breached
-    rate = round((sla_met / scored) * 100.0, 2) if scored else None
 
-    per_priority_rows = []
-    for key in ["urgent", "high", "medium", "low"]:
-        met = per[key]["met"]
-        br = per[key]["breached"]
-        pend = per[key]["pending"]
-        unk = per[key]["unknown"]
-        scored2 = met + br
-        rate2 = round((met / scored2) * 100.0, 2) if scored2 else None
-        per_priority_rows.append({
-            "priority": key.title(),
-            "sla_hours": SLA_HOURS.get(key),
-            "met": met,
-            "breached": br,
-            "pending": pend,
-            "unknown": unk,
-            "rate": rate2,
-        })
+def _rollup_insert(created_cond, closed_cond):
+    """
+    INSERT .. SELECT of created facts (by created day) + closed facts (by closed day)
+    grouped on the rollup key.
+    """
+    met, breached = _created_sla_columns()
+
+    created = select(
+        _day(Ticket.created_at).label("day"),
+        Ticket.maintenance_dept.label("maintenance_dept"),
+        Ticket.priority.label("priority"),
+        Ticket.building_id.label("building_id"),
+        Ticket.status.label("status"),
+        literal(1).label("created_count"),
+        met.label("sla_met"),
+        breached.label("sla_breached"),
+        literal(0).label("closed_count"),
+        literal(0.0).label("close_hours_sum"),
+    ).where(created_cond)
+
+    closed = select(
+        _day(Ticket.closed_at),
+        Ticket.maintenance_dept,
+        Ticket.priority,
+        Ticket.building_id,
+        Ticket.status,
+        literal(0),
+        literal(0),
+        literal(0),
+        literal(1),
+        _close_hours_column(),
+    ).where(Ticket.status == "closed", Ticket.closed_at != None, closed_cond)
+
+    u = union_all(created, closed).subquery()
+    keys = [u.c.day, u.c.maintenance_dept, u.c.priority, u.c.building_id, u.c.status]
+    sums = ["created_count", "sla_met", "sla_breached", "closed_count", "close_hours_sum"]
+
+    grouped = select(*keys, *[func.sum(u.c[k]) for k in sums]).group_by(*keys)
+    cols = ["day", "maintenance_dept", "priority", "building_id", "status"] + sums
+    return insert(KpiDailyRollup).from_select(cols, grouped)
+
+
+# updated_at comes from the app clock at flush, not at commit: a transaction that flushed
+# earlier can commit after a later one -> re-scan this far behind the watermark
+KPI_ROLLUP_OVERLAP = timedelta(seconds=int(os.environ.get("KPI_ROLLUP_OVERLAP", "300")))
+# GET /kpi refreshes the rollup at most this often per process (ticket writes force the next one)
+KPI_ROLLUP_INTERVAL = int(os.environ.get("KPI_ROLLUP_INTERVAL", "60"))
+
+_rollup_lock = threading.Lock()
+_rollup_last = {"at": None, "ok": False}  # last refresh attempt in this process
+
+
+def _rollup_covers(live_day: date) -> bool:
+    state = db.session.get(KpiRollupState, 1)
+    return state is not None and state.rolled_until is not None and state.rolled_until >= live_day
+
+
+def kpi_rollup_ready(live_day: date) -> bool:
+    """
+    Read path: True when kpi_daily_rollup can answer the days before live_day.
+    The DELETE / INSERT refresh runs in one thread per process (non-blocking lock), at most
+    every KPI_ROLLUP_INTERVAL; meanwhile other requests read the last committed rollup.
+    A failed refresh -> raw tickets until the next interval (no retry on every request).
+    """
+    last, ok = _rollup_last["at"], _rollup_last["ok"]
+    fresh = last is not None and (monotonic() - last) < KPI_ROLLUP_INTERVAL
+    if fresh and not ok:
+        return False
+    if fresh and _rollup_covers(live_day):
+        return True
+
+    if _rollup_lock.acquire(blocking=False):
+        try:
+            ok = refresh_kpi_rollup(live_day)
+            _rollup_last.update(at=monotonic(), ok=ok)
+            return ok
+        finally:
+            _rollup_lock.release()
+    return _rollup_covers(live_day)
+
+
+def mark_kpi_rollup_stale():
+    """After ticket writes: the next KPI read in this process refreshes the rollup."""
+    _rollup_last["at"] = None
 
-    return sla_met, sla_breached, sla_pending, sla_unknown, rate, per_priority_rows
+
+def refresh_kpi_rollup(live_day: date) -> bool:
+    """
+    Bring kpi_daily_rollup up to date for every day before live_day.
+    Incremental: only days touched by tickets whose updated_at is past
+    watermark - KPI_ROLLUP_OVERLAP (plus days that were still "live" on the
+    last run) are rebuilt. The state row is locked (FOR UPDATE on PostgreSQL)
+    so concurrent workers rebuild one after the other.
+    Returns False if the rollup can't be trusted (caller falls back to raw).
+    """
+    live_dt = datetime.combine(live_day, time.min)
+
+    try:
+        state = KpiRollupState.query.filter_by(id=1).with_for_update().first()
+
+        if state is None or state.rolled_until is None:
+            # first run -> full build
+            KpiDailyRollup.query.delete(synchronize_session=False)
+            db.session.execute(_rollup_insert(Ticket.created_at < live_dt, Ticket.closed_at < live_dt))
+
+            if state is None:
+                state = KpiRollupState(id=1)
+                db.session.add(state)
+            state.watermark = db.session.query(func.max(Ticket.updated_at)).scalar()
+            state.rolled_until = live_day
+            db.session.commit()
+            return True
+
+        days = set()
+
+        cur = state.rolled_until
+        while cur < live_day:
+            days.add(cur)
+            cur += timedelta(days=1)
+
+        watermark = state.watermark
+        changed = db.session.query(Ticket.created_at, Ticket.closed_at, Ticket.updated_at)
+        if watermark is None:
+            changed = changed.filter(Ticket.updated_at != None)
+        else:
+            # overlap: late commits with an older updated_at are still picked up
+            changed = changed.filter(Ticket.updated_at > watermark - KPI_ROLLUP_OVERLAP)
+
+        for c_at, cl_at, u_at in changed.all():
+            for dt in (c_at, cl_at):
+                if dt is not None and dt < live_dt:
+                    days.add(dt.date())
+            if u_at is not None and (watermark is None or u_at > watermark):
+                watermark = u_at
+
+        spans = _day_spans(days)
+        if spans:
+            KpiDailyRollup.query.filter(
+                or_(*[KpiDailyRollup.day.between(a, b) for a, b in spans])
+            ).delete(synchronize_session=False)
+
+            def in_spans(col):
+                return or_(*[
+                    and_(col >= datetime.combine(a, time.min), col < datetime.combine(b + timedelta(days=1), time.min))
+                    for a, b in spans
+                ])
+
+            db.session.execute(_rollup_insert(in_spans(Ticket.created_at), in_spans(Ticket.closed_at)))
+
+        state.watermark = watermark
+        state.rolled_until = max(state.rolled_until, live_day)
+        db.session.commit()
+        return True
+
+    except Exception:
+        db.session.rollback()
+        log.exception("KPI rollup refresh failed, using raw tickets")
+        return False
+
+
+def _rollup_aggregate(acc, selected_dept: str, d_from: date, d_to: date, trend_from, trend_to):
+    """
+    Same facts as _raw_aggregate, answered from kpi_daily_rollup (whole days only).
+    """
+    R = KpiDailyRollup
+    scope = R.query.filter(R.day >= d_from, R.day <= d_to)
+    if selected_dept:
+        scope = scope.filter(R.maintenance_dept == selected_dept)
+
+    _acc_created(acc, (
+        scope.with_entities(
+            R.maintenance_dept,
+            R.status,
+            R.priority,
+            func.sum(R.created_count),
+            func.sum(R.sla_met),
+            func.sum(R.sla_breached),
+        )
+        .group_by(R.maintenance_dept, R.status, R.priority)
+        .all()
+    ))
+
+    _acc_closed(acc, (
+        scope.with_entities(R.maintenance_dept, func.sum(R.closed_count), func.sum(R.close_hours_sum))
+             .group_by(R.maintenance_dept)
+             .all()
+    ))
+
+    _acc_buildings(acc, (
+        scope.with_entities(R.building_id, func.sum(R.created_count))
+             .group_by(R.building_id)
+             .all()
+    ))
+
+    if trend_from and trend_to and trend_from <= trend_to:
+        trend_q = R.query.filter(R.day >= trend_from, R.day <= trend_to)
+        if selected_dept:
+            trend_q = trend_q.filter(R.maintenance_dept == selected_dept)
+        _acc_counts(acc["trend"], (
+            (d.isoformat(), n)
+            for d, n in trend_q.with_entities(R.day, func.sum(R.created_count)).group_by(R.day).all()
+        ))
+
+
+def _sorted_counts(counts: dict, limit=None):
+    # count desc; ties in the same order SQLite's ORDER BY count(*) DESC gave them
+    items = sorted(counts.items(), key=lambda kv: (kv[0] is not None, kv[0] or ""), reverse=True)
+    items = sorted(items, key=lambda kv: -kv[1])
+    return items[:limit] if limit else items
 
 
 def _compute_kpi_payload(d_from: date, d_to: date, selected_dept: str, dept_locked: bool):
     """
     Central function to compute everything (used by page and excel export).
+    Days before today come from kpi_daily_rollup; today (still moving) from raw tickets.
     """
     start_dt, end_dt = _dt_range(d_from, d_to)
 
     base_scope = Ticket.query
     scope = _dept_scope(base_scope, selected_dept)
 
-    # KPIs within range
-    created_q = scope.filter(Ticket.created_at >= start_dt, Ticket.created_at <= end_dt)
-    created_count = created_q.count()
+    now_utc = datetime.utcnow()
+    live_day = now_utc.date()
 
-    closed_in_range_q = scope.filter(
-        Ticket.status == "closed",
-        Ticket.closed_at != None,
-        Ticket.closed_at >= start_dt,
-        Ticket.closed_at <= end_dt
-    )
-    closed_count = closed_in_range_q.count()
+    # Trend (last 31 days max)
+    max_days = 31
+    trend_end = d_to
+    trend_start = max(d_from, d_to - timedelta(days=max_days - 1))
 
-    open_in_range_count = scope.filter(
-        Ticket.status != "closed",
-        Ticket.created_at >= start_dt,
-        Ticket.created_at <= end_dt
-    ).count()
+    acc = _new_acc()
+    if d_from < live_day and kpi_rollup_ready(live_day):
+        hist_to = min(d_to, live_day - timedelta(days=1))
+        _rollup_aggregate(acc, selected_dept, d_from, hist_to, trend_start, min(trend_end, hist_to))
 
-    closed_rows = closed_in_range_q.with_entities(Ticket.created_at, Ticket.closed_at).all()
-    durations_hours = []
-    for c_at, cl_at in closed_rows:
-        if c_at and cl_at:
-            durations_hours.append((cl_at - c_at).total_seconds() / 3600.0)
-    avg_close_hours = round(sum(durations_hours) / len(durations_hours), 2) if durations_hours else None
+        if d_to >= live_day:
+            live_start, _ = _dt_range(live_day, live_day)
+            _raw_aggregate(acc, scope, live_start, end_dt, max(trend_start, live_day), trend_end)
+    else:
+        _raw_aggregate(acc, scope, start_dt, end_dt, trend_start, trend_end)
 
-    # Backlog + aging
-    now_utc = datetime.utcnow()
-    open_now_q = scope.filter(Ticket.status != "closed")
-    backlog_now = open_now_q.count()
-    aging_buckets, aging_7_plus = _aging_buckets_for_open(open_now_q, now_utc)
+    _acc_open_now(acc, scope, now_utc)
+    per_dept = acc["per_dept"]
+    per_priority = acc["per_priority"]
 
-    # SLA
-    sla_met, sla_breached, sla_pending, sla_unknown, sla_rate, sla_priority_rows = _sla_eval_for_query(created_q)
+    total = _new_stats()
+    for s in per_dept.values():
+        for k, v in s.items():
+            if k == "aging":
+                total["aging"] = [a + b for a, b in zip(total["aging"], v)]
+            else:
+                total[k] += v
 
-    # Breakdowns
-    by_status = (
-        created_q.with_entities(Ticket.status, func.count(Ticket.id))
-                .group_by(Ticket.status)
-                .order_by(func.count(Ticket.id).desc())
-                .all()
-    )
+    # KPIs within range
+    created_count = total["created"]
+    closed_count = total["closed"]
+    open_in_range_count = total["open_in_range"]
+    avg_close_hours = round(total["close_hours"] / total["close_n"], 2) if total["close_n"] else None
 
-    by_priority = (
-        created_q.with_entities(Ticket.priority, func.count(Ticket.id))
-                .group_by(Ticket.priority)
-                .order_by(func.count(Ticket.id).desc())
-                .all()
-    )
+    # Backlog + aging
+    backlog_now = total["backlog"]
+    aging_buckets = list(zip(["0-24 hours", "1-3 days", "4-7 days", "> 7 days"], total["aging"]))
+    aging_7_plus = total["aging"][3]
 
-    by_building = (
-        created_q.join(Building, Building.id == Ticket.building_id, isouter=True)
-                .with_entities(Building.name, func.count(Ticket.id))
-                .group_by(Building.name)
-                .order_by(func.count(Ticket.id).desc())
-                .limit(10)
-                .all()
-    )
+    # SLA
+    sla_met = total["sla_met"]
+    sla_breached = total["sla_breached"]
+    sla_pending = total["sla_pending"]
+    sla_unknown = total["sla_unknown"]
+    sla_rate = _sla_rate(sla_met, sla_breached)
 
-    # Trend (last 31 days max)
-    max_days = 31
-    trend_end = d_to
-    trend_start = max(d_from, d_to - timedelta(days=max_days - 1))
-    t_start_dt, t_end_dt = _dt_range(trend_start, trend_end)
+    sla_priority_rows = []
+    for key in ["urgent", "high", "medium", "low"]:
+        p = per_priority[key]
+        sla_priority_rows.append({
+            "priority": key.title(),
+            "sla_hours": SLA_HOURS.get(key),
+            "met": p["met"],
+            "breached": p["breached"],
+            "pending": p["pending"],
+            "unknown": p["unknown"],
+            "rate": _sla_rate(p["met"], p["breached"]),
+        })
 
-    trend_rows = (
-        scope.filter(Ticket.created_at >= t_start_dt, Ticket.created_at <= t_end_dt)
-             .with_entities(Ticket.created_at)
-             .all()
-    )
-    counts_map = {}
-    for (dt,) in trend_rows:
-        if not dt:
-            continue
-        k = dt.date().isoformat()
-        counts_map[k] = counts_map.get(k, 0) + 1
+    # Breakdowns
+    by_status = _sorted_counts(acc["status"])
+    by_priority = _sorted_counts(acc["priority"])
+    by_building = _sorted_counts(acc["building"], limit=10)
 
+    counts_map = acc["trend"]
     trend_labels, trend_values = [], []
     cur = trend_start
     while cur <= trend_end:
@@ -253,7 +598,7 @@ def _compute_kpi_payload(d_from: date, d_to: date, selected_dept: str, dept_lock
         trend_values.append(counts_map.get(key, 0))
         cur += timedelta(days=1)
 
-    # Dept comparison (only for ALL and not locked)
+    # Dept comparison (only for ALL and not locked) -> same aggregate rows
     available_depts = list(MAINT_DEPTS)
     dept_compare_rows = []
     best_sla = None
@@ -263,36 +608,17 @@ def _compute_kpi_payload(d_from: date, d_to: date, selected_dept: str, dept_lock
 
     if show_dept_compare:
         for d in available_depts:
-            dept_scope = base_scope.filter(Ticket.maintenance_dept == d)
-
-            dept_created_q = dept_scope.filter(Ticket.created_at >= start_dt, Ticket.created_at <= end_dt)
-            dept_created = dept_created_q.count()
-
-            dept_closed_q = dept_scope.filter(
-                Ticket.status == "closed",
-                Ticket.closed_at != None,
-                Ticket.closed_at >= start_dt,
-                Ticket.closed_at <= end_dt
-            )
-            dept_closed = dept_closed_q.count()
-
-            dept_open_now_q = dept_scope.filter(Ticket.status != "closed")
-            dept_backlog = dept_open_now_q.count()
-
-            _, dept_aging_7_plus = _aging_buckets_for_open(dept_open_now_q, now_utc)
-
-            d_met, d_br, d_pend, d_unk, d_rate, _ = _sla_eval_for_query(dept_created_q)
-
+            s = per_dept.get(d) or _new_stats()
             row = {
                 "dept": d.upper(),
-                "created": dept_created,
-                "closed": dept_closed,
-                "backlog": dept_backlog,
-                "sla_met": d_met,
-                "sla_breached": d_br,
-                "sla_pending": d_pend,
-                "sla_rate": d_rate,
-                "aging_7_plus": dept_aging_7_plus,
+                "created": s["created"],
+                "closed": s["closed"],
+                "backlog": s["backlog"],
+                "sla_met": s["sla_met"],
+                "sla_breached": s["sla_breached"],
+                "sla_pending": s["sla_pending"],
+                "sla_rate": _sla_rate(s["sla_met"], s["sla_breached"]),
+                "aging_7_plus": s["aging"][3],
             }
             dept_compare_rows.append(row)
 
@@ -341,6 +667,147 @@ def _compute_kpi_payload(d_from: date, d_to: date, selected_dept: str, dept_lock
     }
 
 
+# -------------------------
+# Per-process KPI payload cache (page + export with same filters -> one computation)
+# ✅ cross-process: writes bump the shared "kpi_cache" counter row; every process
+#    compares it on each read and drops its payloads when another worker wrote
+# -------------------------
+KPI_CACHE_TTL = int(os.environ.get("KPI_CACHE_TTL", "60"))  # seconds (backlog/aging are "now" values)
+KPI_CACHE_MAX = 64
+KPI_CACHE_COUNTER = "kpi_cache"  # counter.name
+
+_kpi_cache = OrderedDict()  # (d_from, d_to, dept, locked) -> (expires_at, payload)
+_kpi_cache_lock = threading.Lock()
+_kpi_cache_gen = 0
+_kpi_shared_gen = None  # counter value this process's cache matches
+_kpi_cache_stats = {"hits": 0, "misses": 0, "invalidated": 0}
+
+
+def _read_shared_gen():
+    """counter.value for KPI_CACHE_COUNTER (0 before the first write, None if unreadable)."""
+    try:
+        value = db.session.query(Counter.value).filter(Counter.name == KPI_CACHE_COUNTER).scalar()
+    except Exception:
+        db.session.rollback()
+        log.exception("KPI cache counter unreadable, cache bounded by TTL only")
+        return None
+    return int(value or 0)
+
+
+def _bump_shared_gen():
+    """+1 on the shared counter in its own transaction; returns the new value (None on failure)."""
+    table = Counter.__table__
+    try:
+        for _ in range(2):
+            with db.engine.begin() as conn:
+                conn.execute(table.update().where(table.c.name == KPI_CACHE_COUNTER)
+                             .values(value=table.c.value + 1))
+                value = conn.execute(select(table.c.value)
+                                     .where(table.c.name == KPI_CACHE_COUNTER)).scalar()
+                if value is not None:
+                    return int(value)
+            try:
+                with db.engine.begin() as conn:
+                    conn.execute(table.insert().values(name=KPI_CACHE_COUNTER, value=1))
+                return 1
+            except IntegrityError:
+                continue  # another process created it first -> bump that row
+    except Exception:
+        log.exception("KPI cache counter bump failed, other workers rely on TTL")
+    return None
+
+
+def _sync_shared_gen():
+    """Another process wrote tickets since our last look -> drop every cached payload."""
+    global _kpi_cache_gen, _kpi_shared_gen
+    shared = _read_shared_gen()
+    if shared is None:
+        return
+    with _kpi_cache_lock:
+        if shared == _kpi_shared_gen:
+            return
+        if _kpi_shared_gen is not None:
+            _kpi_cache_stats["invalidated"] += len(_kpi_cache)
+            _kpi_cache.clear()
+            _kpi_cache_gen += 1
+            mark_kpi_rollup_stale()
+        _kpi_shared_gen = shared
+
+
+def _cached_kpi_payload(d_from: date, d_to: date, selected_dept: str, dept_locked: bool):
+    """
+    _compute_kpi_payload behind a TTL/LRU cache keyed by the resolved filters.
+    The payload is shared between requests -> treat it as read-only.
+    """
+    global _kpi_cache_gen
+    key = (d_from, d_to, selected_dept, dept_locked)
+
+    _sync_shared_gen()
+    with _kpi_cache_lock:
+        hit = _kpi_cache.get(key)
+        if hit and hit[0] > monotonic():
+            _kpi_cache.move_to_end(key)
+            _kpi_cache_stats["hits"] += 1
+            return hit[1]
+        _kpi_cache_stats["misses"] += 1
+        gen = _kpi_cache_gen
+
+    data = _compute_kpi_payload(d_from, d_to, selected_dept, dept_locked)
+
+    with _kpi_cache_lock:
+        # a ticket write during the computation -> don't store a stale payload
+        if gen == _kpi_cache_gen:
+            _kpi_cache[key] = (monotonic() + KPI_CACHE_TTL, data)
+            _kpi_cache.move_to_end(key)
+            while len(_kpi_cache) > KPI_CACHE_MAX:
+                _kpi_cache.popitem(last=False)
+
+    return data
+
+
+def invalidate_kpi_cache(*depts):
+    """
+    Called after ticket writes. Drops cached payloads for the given depts and
+    for "All". Backlog/aging are "open now" values, so a write makes every
+    date range of its dept stale, not only the ticket's own days.
+    No depts -> clear everything.
+    Other processes see the shared counter bump and clear their whole cache
+    on their next KPI read.
+    """
+    global _kpi_cache_gen, _kpi_shared_gen
+    wanted = {_normalize_dept(d) for d in depts if d}
+
+    mark_kpi_rollup_stale()
+    with _kpi_cache_lock:
+        _kpi_cache_gen += 1
+        for key in list(_kpi_cache.keys()):
+            dept = key[2]
+            if not wanted or dept == "" or dept in wanted:
+                del _kpi_cache[key]
+                _kpi_cache_stats["invalidated"] += 1
+
+    shared = _bump_shared_gen()
+    with _kpi_cache_lock:
+        # only our own bump since the last sync -> the per-dept drop above is enough here
+        if shared is not None and _kpi_shared_gen is not None and shared == _kpi_shared_gen + 1:
+            _kpi_shared_gen = shared
+
+
+def kpi_cache_stats():
+    with _kpi_cache_lock:
+        hits = _kpi_cache_stats["hits"]
+        misses = _kpi_cache_stats["misses"]
+        return {
+            "hits": hits,
+            "misses": misses,
+            "invalidated": _kpi_cache_stats["invalidated"],
+            "size": len(_kpi_cache),
+            "hit_rate": round((hits / (hits + misses)) * 100.0, 2) if (hits + misses) else None,
+            "ttl_seconds": KPI_CACHE_TTL,
+            "shared_gen": _kpi_shared_gen,
+        }
+
+
 def _resolve_filters():
     """
     Resolve date range + dept with role-based locking.
@@ -379,7 +846,7 @@ def _resolve_filters():
 @login_required
 def kpi():
     d_from, d_to, selected_dept, dept_locked, available_depts = _resolve_filters()
-    data = _compute_kpi_payload(d_from, d_to, selected_dept, dept_locked)
+    data = _cached_kpi_payload(d_from, d_to, selected_dept, dept_locked)
 
     return render_template(
         "kpi.html",
@@ -422,56 +889,159 @@ def kpi():
     )
 
 
+@bp.get("/kpi/cache-stats")
+@login_required
+def kpi_cache_stats_view():
+    if current_user.role not in ("admin", "supervisor"):
+        abort(403)
+    return jsonify(kpi_cache_stats())
+
+
+XLSX_WIDTH_SAMPLE_ROWS = 500   # rows held back per sheet to size columns (write-only mode)
+XLSX_TICKETS_BATCH = 1000      # yield_per batch for the raw "Tickets" sheet
+
+
+class _XlsxSheet:
+    """
+    Write-only sheet with column widths from running max lengths.
+    openpyxl writes <cols> before the first row, so the first rows are held back
+    to size the columns; after that every row goes straight to the temp file.
+    """
+
+    def __init__(self, wb, title, header_font=None, header_align=None):
+        self.ws = wb.create_sheet(title)
+        self.header_font = header_font
+        self.header_align = header_align
+        self.widths = {}
+        self.pending = []
+        self.flushed = False
+
+    def _track(self, row):
+        for i, val in enumerate(row, 1):
+            try:
+                n = len("" if val is None else str(val))
+            except Exception:
+                n = 0
+            if n > self.widths.get(i, 0):
+                self.widths[i] = n
+
+    def _write(self, row, header=False):
+        if header and self.header_font is not None:
+            from openpyxl.cell import WriteOnlyCell
+            cells = []
+            for val in row:
+                c = WriteOnlyCell(self.ws, value=val)
+                c.font = self.header_font
+                c.alignment = self.header_align
+                cells.append(c)
+            row = cells
+        self.ws.append(row)
+
+    def flush(self):
+        if self.flushed:
+            return
+        from openpyxl.utils import get_column_letter
+        for i, max_len in self.widths.items():
+            self.ws.column_dimensions[get_column_letter(i)].width = min(max(10, max_len + 2), 45)
+        for row, header in self.pending:
+            self._write(row, header)
+        self.pending = []
+        self.flushed = True
+
+    def append(self, row, header=False):
+        row = list(row)
+        if self.flushed:
+            self._write(row, header)
+            return
+        self._track(row)
+        self.pending.append((row, header))
+        if len(self.pending) >= XLSX_WIDTH_SAMPLE_ROWS:
+            self.flush()
+
+    def header(self, row):
+        self.append(row, header=True)
+
+
+def _iter_ticket_rows(selected_dept: str, start_dt: datetime, end_dt: datetime):
+    """
+    Every ticket created in range, streamed with yield_per (constant memory).
+    """
+    def fmt(dt):
+        return dt.strftime("%Y-%m-%d %H:%M") if dt else ""
+
+    q = (
+        _dept_scope(Ticket.query, selected_dept)
+        .filter(Ticket.created_at >= start_dt, Ticket.created_at <= end_dt)
+        .with_entities(
+            Ticket.ticket_no, Ticket.created_at, Ticket.maintenance_dept, Ticket.priority,
+            Ticket.status, Ticket.requester_name, Ticket.requester_extension,
+            Ticket.building_id, Ticket.floor_id, Ticket.section_id, Ticket.room_id,
+            Ticket.error_name, Ticket.title,
+            Ticket.started_at, Ticket.ended_at, Ticket.closed_at,
+        )
+        .order_by(Ticket.created_at.asc(), Ticket.id.asc())
+        .yield_per(XLSX_TICKETS_BATCH)
+    )
+
+    for r in q:
+        close_hours = None
+        if r.closed_at and r.created_at:
+            close_hours = round((r.closed_at - r.created_at).total_seconds() / 3600.0, 2)
+        yield [
+            r.ticket_no,
+            fmt(r.created_at),
+            (r.maintenance_dept or "").upper(),
+            r.priority,
+            r.status,
+            r.requester_name,
+            r.requester_extension or "",
+            location_registry.name("building", r.building_id, "-"),
+            location_registry.name("floor", r.floor_id, "-"),
+            location_registry.name("section", r.section_id, "-"),
+            location_registry.name("room", r.room_id, "-"),
+            r.error_name or "",
+            r.title,
+            fmt(r.started_at),
+            fmt(r.ended_at),
+            fmt(r.closed_at),
+            close_hours if close_hours is not None else "-",
+        ]
+
+
 @bp.get("/kpi/export.xlsx")
 @login_required
 def kpi_export_xlsx():
     """
-    Export the SAME KPI view to Excel (.xlsx) with the same filters.
+    Export the SAME KPI view to Excel (.xlsx) with the same filters,
+    plus a raw "Tickets" sheet. Built in openpyxl write-only mode and sent
+    from a temp file -> memory stays flat for a full year of tickets.
     """
     try:
         from openpyxl import Workbook
-        from openpyxl.utils import get_column_letter
         from openpyxl.styles import Font, Alignment
     except Exception:
         return "openpyxl is not installed. Run: pip install openpyxl", 500
 
     d_from, d_to, selected_dept, dept_locked, available_depts = _resolve_filters()
-    data = _compute_kpi_payload(d_from, d_to, selected_dept, dept_locked)
+    data = _cached_kpi_payload(d_from, d_to, selected_dept, dept_locked)
 
     dept_label = selected_dept.upper() if selected_dept else "ALL"
     filename = f"KPI_{dept_label}_{d_from.isoformat()}_to_{d_to.isoformat()}.xlsx"
 
-    wb = Workbook()
-
-    def _style_header(row_cells):
-        for c in row_cells:
-            c.font = Font(bold=True)
-            c.alignment = Alignment(horizontal="center")
-
-    def _autosize(ws):
-        # ✅ FIXED: proper autosize loop
-        for col in ws.columns:
-            max_len = 0
-            col_letter = get_column_letter(col[0].column)
-            for cell in col:
-                try:
-                    val = "" if cell.value is None else str(cell.value)
-                    if len(val) > max_len:
-                        max_len = len(val)
-                except Exception:
-                    pass
-            ws.column_dimensions[col_letter].width = min(max(10, max_len + 2), 45)
+    wb = Workbook(write_only=True)
+    bold = Font(bold=True)
+    center = Alignment(horizontal="center")
 
-    # ---------------- Sheet: Summary ----------------
-    ws = wb.active
-    ws.title = "Summary"
+    def sheet(title):
+        return _XlsxSheet(wb, title, header_font=bold, header_align=center)
 
+    # ---------------- Sheet: Summary ----------------
+    ws = sheet("Summary")
     ws.append(["Department", dept_label])
     ws.append(["From", d_from.isoformat()])
     ws.append(["To", d_to.isoformat()])
     ws.append([])
-    ws.append(["Metric", "Value"])
-    _style_header(ws[5])
+    ws.header(["Metric", "Value"])
 
     ws.append(["Created (in range)", data["created_count"]])
     ws.append(["Open (in range)", data["open_in_range_count"]])
@@ -485,14 +1055,11 @@ def kpi_export_xlsx():
     ws.append(["SLA Breached", data["sla_breached"]])
     ws.append(["SLA Pending", data["sla_pending"]])
     ws.append(["SLA Rate (%)", data["sla_rate"] if data["sla_rate"] is not None else "-"])
-
-    _autosize(ws)
+    ws.flush()
 
     # ---------------- Sheet: SLA ----------------
-    ws = wb.create_sheet("SLA")
-    ws.append(["Priority", "SLA (hours)", "Met", "Breached", "Pending", "Rate (%)"])
-    _style_header(ws[1])
-
+    ws = sheet("SLA")
+    ws.header(["Priority", "SLA (hours)", "Met", "Breached", "Pending", "Rate (%)"])
     for r in data["sla_priority_rows"]:
         ws.append([
             r["priority"],
@@ -502,37 +1069,33 @@ def kpi_export_xlsx():
             r["pending"],
             r["rate"] if r["rate"] is not None else "-"
         ])
-    _autosize(ws)
+    ws.flush()
 
     # ---------------- Sheet: Aging ----------------
-    ws = wb.create_sheet("Aging")
-    ws.append(["Bucket", "Count (Open Now)"])
-    _style_header(ws[1])
+    ws = sheet("Aging")
+    ws.header(["Bucket", "Count (Open Now)"])
     for label, cnt in data["aging_buckets"]:
         ws.append([label, cnt])
-    _autosize(ws)
+    ws.flush()
 
     # ---------------- Sheet: Trend ----------------
-    ws = wb.create_sheet("Trend")
-    ws.append(["Date", "Created Count"])
-    _style_header(ws[1])
+    ws = sheet("Trend")
+    ws.header(["Date", "Created Count"])
     for d, c in zip(data["trend_labels"], data["trend_values"]):
         ws.append([d, c])
-    _autosize(ws)
+    ws.flush()
 
     # ---------------- Sheet: Top Buildings ----------------
-    ws = wb.create_sheet("Top Buildings")
-    ws.append(["Building", "Count (Created in Range)"])
-    _style_header(ws[1])
+    ws = sheet("Top Buildings")
+    ws.header(["Building", "Count (Created in Range)"])
     for bname, cnt in data["by_building"]:
         ws.append([bname if bname else "-", cnt])
-    _autosize(ws)
+    ws.flush()
 
     # ---------------- Sheet: Dept Compare (only if ALL) ----------------
     if data["show_dept_compare"]:
-        ws = wb.create_sheet("Dept Compare")
-        ws.append(["Dept", "Created", "Closed", "Backlog", "SLA Met", "SLA Breached", "SLA Pending", "SLA Rate (%)", "> 7 days open"])
-        _style_header(ws[1])
+        ws = sheet("Dept Compare")
+        ws.header(["Dept", "Created", "Closed", "Backlog", "SLA Met", "SLA Breached", "SLA Pending", "SLA Rate (%)", "> 7 days open"])
         for r in data["dept_compare_rows"]:
             ws.append([
                 r["dept"],
@@ -545,15 +1108,27 @@ def kpi_export_xlsx():
                 r["sla_rate"] if r["sla_rate"] is not None else "-",
                 r["aging_7_plus"],
             ])
-        _autosize(ws)
+        ws.flush()
+
+    # ---------------- Sheet: Tickets (raw, streamed) ----------------
+    ws = sheet("Tickets")
+    ws.header([
+        "Job No", "Created", "Dept", "Priority", "Status", "Caller", "Extension",
+        "Building", "Floor", "Section", "Room", "Error", "Title",
+        "Started", "Ended", "Closed", "Close Time (hours)",
+    ])
+    start_dt, end_dt = _dt_range(d_from, d_to)
+    for row in _iter_ticket_rows(selected_dept, start_dt, end_dt):
+        ws.append(row)
+    ws.flush()
 
-    # Save to memory
-    bio = BytesIO()
-    wb.save(bio)
-    bio.seek(0)
+    # write-only workbook -> temp file on disk, then streamed by send_file
+    out = tempfile.TemporaryFile()
+    wb.save(out)
+    out.seek(0)
 
     return send_file(
-        bio,
+        out,
         as_attachment=True,
         download_name=filename,
         mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
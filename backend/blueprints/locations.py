@@ -4,6 +4,8 @@ from flask_login import login_required, current_user
 from sqlalchemy import func
 
 from models import db, Building, Floor, HospitalSection, Room
+import location_registry
+import ticket_search
 
 bp = Blueprint("locations", __name__)
 
@@ -72,6 +74,7 @@ def add_building():
 
     db.session.add(Building(name=name))
     db.session.commit()
+    location_registry.invalidate()
     flash("Building added.", "success")
     return redirect(url_for("locations.locations_home"))
 
@@ -102,6 +105,7 @@ def add_floor():
 
     db.session.add(Floor(building_id=building_id, name=name))
     db.session.commit()
+    location_registry.invalidate()
     flash("Floor added.", "success")
     return redirect(url_for("locations.locations_home", building_id=building_id))
 
@@ -133,6 +137,7 @@ def add_section():
 
     db.session.add(HospitalSection(building_id=building_id, floor_id=floor_id, name=name))
     db.session.commit()
+    location_registry.invalidate()
     flash("Section added.", "success")
     return redirect(url_for("locations.locations_home", building_id=building_id, floor_id=floor_id))
 
@@ -165,10 +170,60 @@ def add_room():
 
     db.session.add(Room(building_id=building_id, floor_id=floor_id, section_id=section_id, name=name))
     db.session.commit()
+    location_registry.invalidate()
     flash("Room added.", "success")
     return redirect(url_for("locations.locations_home", building_id=building_id, floor_id=floor_id, section_id=section_id))
 
 
+def _selection(kind, obj):
+    """locations_home args that keep obj selected."""
+    if kind == "building":
+        return {"building_id": obj.id}
+    if kind == "floor":
+        return {"building_id": obj.building_id, "floor_id": obj.id}
+    if kind == "section":
+        return {"building_id": obj.building_id, "floor_id": obj.floor_id, "section_id": obj.id}
+    return {"building_id": obj.building_id, "floor_id": obj.floor_id, "section_id": obj.section_id}
+
+
+@bp.post("/locations/rename")
+@login_required
+def rename_location():
+    if not _admin_only():
+        flash("Admin only.", "danger")
+        return redirect(url_for("dashboard.dashboard"))
+
+    kind = (request.form.get("kind") or "").strip()
+    item_id = request.form.get("id", type=int)
+    name = (request.form.get("name") or "").strip()
+
+    if kind not in ("building", "floor", "section", "room") or not item_id or not name:
+        flash("Invalid rename request.", "danger")
+        return redirect(url_for("locations.locations_home"))
+
+    model = {"building": Building, "floor": Floor, "section": HospitalSection, "room": Room}[kind]
+    obj = model.query.get(item_id)
+    if not obj:
+        flash("Item not found.", "warning")
+        return redirect(url_for("locations.locations_home"))
+
+    try:
+        rooms = location_registry.rooms_under(db.session.connection(), kind, item_id)
+        obj.name = name
+        db.session.flush()
+        # ✅ same transaction: tickets location_path + search index
+        n = location_registry.refresh_ticket_paths(db.session.connection(), rooms)
+        ticket_search.reindex_rooms(db.session.connection(), rooms)
+        db.session.commit()
+        location_registry.invalidate()
+        flash(f"Renamed ({n} tickets updated).", "success")
+    except Exception as e:
+        db.session.rollback()
+        flash(f"Cannot rename. {e}", "danger")
+
+    return redirect(url_for("locations.locations_home", **_selection(kind, obj)))
+
+
 @bp.post("/locations/delete")
 @login_required
 def delete_location():
@@ -190,8 +245,14 @@ def delete_location():
         return redirect(url_for("locations.locations_home"))
 
     try:
+        # ✅ rooms before the delete: afterwards the deleted rows can't lead us to the tickets
+        rooms = location_registry.rooms_under(db.session.connection(), kind, item_id)
         db.session.delete(obj)
+        db.session.flush()
+        location_registry.refresh_ticket_paths(db.session.connection(), rooms)
+        ticket_search.reindex_rooms(db.session.connection(), rooms)
         db.session.commit()
+        location_registry.invalidate()
         flash("Deleted.", "success")
     except Exception as e:
         db.session.rollback()
@@ -1,44 +1,88 @@
 # backend/blueprints/printing_pdf.py
 import os
 from io import BytesIO
-from datetime import datetime
-
-from flask import Blueprint, send_file, abort
-from flask_login import login_required
-
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from reportlab.lib.utils import ImageReader
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-
-import arabic_reshaper
-from bidi.algorithm import get_display
-
-from models import Ticket, Building, Floor, HospitalSection, Room, User
+from functools import lru_cache
+
+from flask import Blueprint, send_file, abort, request, make_response
+from flask_login import login_required, current_user
+
+from models import Ticket
+import lazy_import
+import pdf_cache
+import work_order
+
+# ✅ heavy deps load on the first print, not at create_app / worker start (lazy_import.py)
+lazy_import.require("reportlab", "arabic_reshaper", "bidi")  # missing -> blueprint skipped
+pagesizes = lazy_import.lazy("reportlab.lib.pagesizes")
+pdfmetrics = lazy_import.lazy("reportlab.pdfbase.pdfmetrics")
+canvas = lazy_import.lazy("reportlab.pdfgen.canvas")
+arabic_reshaper = lazy_import.lazy("arabic_reshaper")
+bidi = lazy_import.lazy("bidi.algorithm")
+pdf_pool = lazy_import.lazy("pdf_pool")            # pypdf
+pdf_resources = lazy_import.lazy("pdf_resources")  # reportlab
 
 bp = Blueprint("printing_pdf", __name__)
 
+# bump on any layout change -> old cached PDFs (pdf_cache) stop matching
+TEMPLATE_VERSION = 2
+
+# max tickets per /tickets/print.pdf request
+PRINT_BATCH_MAX = int(os.environ.get("PRINT_BATCH_MAX", "300"))
+
+# shaped dynamic strings kept per process (names / locations / descriptions)
+AR_CACHE_SIZE = int(os.environ.get("PDF_AR_CACHE_SIZE", "4096"))
+
+# ---- fixed labels (shaped once, on the first ar() call) ----
+JOB_HEADS = (
+    ("Job Time", "وقت البلاغ"),
+    ("Job Date", "تاريخ البلاغ"),
+    ("Job No", "رقم أمر العمل"),
+    ("Emp No", "الرقم الوظيفي"),     # المستخدم اللي بيطبع (work_order)
+    ("Requestor #", "التحويلة"),
+)
+SIGNATURES = ("رئيس قسم الصيانة العامة", "مشرف قسم الصيانة العامة", "مسؤول القسم", "الفني المختص")
+STATIC_LABELS = (
+    "الصيانة العامة", "وقت الطباعة", "تاريخ الطباعة", "اسم المستخدم",
+    "اسم طالب الصيانة", "موقع طالب الصيانة", "اسم القسم", "رقم الطابق", "رقم / اسم المكتب",
+    "نوع الصيانة", "اسم العطل / المشكلة", "درجة الأهمية", "حالة أمر العمل", "وصف العطل",
+    "قطع الغيار المطلوبة", "التقرير الفني",
+) + tuple(lbl for _, lbl in JOB_HEADS) + SIGNATURES
+
 def mm(v: float) -> float:
     return v * 2.83464567
 
 def safe_str(x):
     return "" if x is None else str(x)
 
-def get_attr(obj, name, default=None):
-    if obj is None:
-        return default
-    return getattr(obj, name, default)
+def _shape(text: str) -> str:
+    return bidi.get_display(arabic_reshaper.reshape(text))
+
+_AR_STATIC = {}
+
+@lru_cache(maxsize=AR_CACHE_SIZE)
+def _shape_cached(text: str) -> str:
+    return _shape(text)
 
 def ar(text: str) -> str:
     if not text:
         return ""
-    reshaped = arabic_reshaper.reshape(str(text))
-    return get_display(reshaped)
+    s = str(text)
+    if s.isascii():
+        return s  # nothing to reshape / reorder
+    if not _AR_STATIC:
+        _AR_STATIC.update((lbl, _shape(lbl)) for lbl in STATIC_LABELS)
+    shaped = _AR_STATIC.get(s)
+    if shaped is None:
+        shaped = _shape_cached(s)
+    return shaped
+
+def ar_stats() -> dict:
+    info = _shape_cached.cache_info()
+    return {"static": len(_AR_STATIC), "hits": info.hits, "misses": info.misses,
+            "size": info.currsize, "maxsize": info.maxsize}
 
 def static_path(*parts):
-    base = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "static"))
-    return os.path.join(base, *parts)
+    return pdf_resources.static_path(*parts)
 
 def register_fonts():
     """
@@ -46,93 +90,65 @@ def register_fonts():
       - Cairo-Regular.ttf / Cairo-Bold.ttf
       - Amiri-Regular.ttf / Amiri-Bold.ttf
     Fallback to Helvetica if not found.
+    ✅ registered once per process (pdf_resources), not per request
     """
-    fonts_dir = static_path("fonts")
-    candidates = [
-        ("Cairo", os.path.join(fonts_dir, "Cairo-Regular.ttf"), os.path.join(fonts_dir, "Cairo-Bold.ttf")),
-        ("Amiri", os.path.join(fonts_dir, "Amiri-Regular.ttf"), os.path.join(fonts_dir, "Amiri-Bold.ttf")),
-    ]
-    for base, reg, bold in candidates:
-        if os.path.exists(reg) and os.path.exists(bold):
-            pdfmetrics.registerFont(TTFont(base, reg))
-            pdfmetrics.registerFont(TTFont(base + "-B", bold))
-            return base, base + "-B"
-
-    return "Helvetica", "Helvetica-Bold"
+    return pdf_resources.fonts()
 
-@bp.get("/tickets/<int:ticket_id>/print.pdf")
-@login_required
-def print_ticket_pdf(ticket_id: int):
-    t = Ticket.query.get(ticket_id)
-    if not t:
-        abort(404)
+def load_header():
+    """static/header.png, decoded once per process (None if missing) -> embedded once per PDF."""
+    return pdf_resources.image("header.png")
 
-    # ---- Location objects (safe) ----
-    building = Building.query.get(get_attr(t, "building_id"))
-    floor = Floor.query.get(get_attr(t, "floor_id"))
-    section = HospitalSection.query.get(get_attr(t, "section_id"))
-    room = Room.query.get(get_attr(t, "room_id"))
-
-    # ---- Requester fields (support both names) ----
-    requester_name = get_attr(t, "requester_name")
-    if not requester_name:
-        requester_name = get_attr(t, "caller_name", "")  # fallback قديم
-    requester_name = requester_name or ""
-
-    requester_extension = get_attr(t, "requester_extension")
-    if requester_extension is None:
-        requester_extension = get_attr(t, "requester_ext")
-    requester_extension = requester_extension or ""
-
-    # ---- Ticket No ----
-    ticket_no = get_attr(t, "ticket_no")
-    if ticket_no is None:
-        ticket_no = get_attr(t, "ticket_number")
-    if ticket_no is None:
-        ticket_no = get_attr(t, "ticket_id")
-    if ticket_no is None:
-        ticket_no = get_attr(t, "id", "")
-
-    # ---- Times ----
-    created_at = get_attr(t, "created_at")
-    job_time = created_at.strftime("%I:%M %p") if created_at else ""
-    job_date = created_at.strftime("%d/%m/%Y") if created_at else ""
-
-    now = datetime.now()
-    print_time = now.strftime("%I:%M %p")
-    print_date = now.strftime("%d/%m/%Y")
-
-    # ---- Other fields ----
-    maintenance_dept = safe_str(get_attr(t, "maintenance_dept", ""))
-    error_name = safe_str(get_attr(t, "error_name", ""))
-    priority = safe_str(get_attr(t, "priority", ""))
-    status = safe_str(get_attr(t, "status", ""))
-    description = safe_str(get_attr(t, "description", ""))
-
-    # ---- Fonts ----
-    FONT_REG, FONT_BOLD = register_fonts()
-
-    # ---- PDF canvas ----
-    buf = BytesIO()
-    c = canvas.Canvas(buf, pagesize=A4)
-    W, H = A4
+print_stamp = work_order.print_stamp
+
+class _Skip:
+    """Canvas stand-in that ignores drawing (the layer not being drawn)."""
+    def __getattr__(self, name):
+        return lambda *a, **k: None
+
+_SKIP = _Skip()
+
+LAYOUT_FORM = "work_order_layout"
+STAMP_FORM = "work_order_stamp"
+# standard font -> plain bytes in the content stream (pdf_cache.stamp() patches them);
+# digits / "/" / ":" same width, AM vs PM < 1pt
+STAMP_FONT = "Helvetica-Bold"
+
+def _draw_layers(c, f, fonts, header, static=True, values=True, top=None):
+    """
+    Work order drawing from work_order.build() f, split in two layers on the same geometry:
+      static -> border / header / boxes / labels / lines (S)
+      values -> ticket fields (V); print time / date -> _draw_stamp()
+    Returns the top of row 1 (depends on whether the header was drawn).
+    """
+    S = c if static else _SKIP
+    V = c if values else _SKIP
+
+    FONT_REG, FONT_BOLD = fonts
+    W, H = pagesizes.A4
 
     margin = mm(8)
     x0, y0 = margin, margin
     x1, y1 = W - margin, H - margin
 
+    f = f or {}
+    requester_name = f.get("requester_name", "")
+    requester_extension = f.get("requester_extension", "")
+    ticket_no = f.get("ticket_no", "")
+    job_time, job_date = f.get("job_time", ""), f.get("job_date", "")
+    user_name, emp_no = f.get("user_name", ""), f.get("emp_no", "")
+
     # Border
-    c.setLineWidth(2)
-    c.rect(x0, y0, x1 - x0, y1 - y0)
+    S.setLineWidth(2)
+    S.rect(x0, y0, x1 - x0, y1 - y0)
 
     # Header image (optional)
-    y = y1
     header_h = mm(22)
-    header_path = static_path("header.png")
-    if os.path.exists(header_path):
+    if not static:
+        y = top
+    elif header is not None:
         try:
-            img = ImageReader(header_path)
-            c.drawImage(img, x0, y1 - header_h, width=(x1 - x0), height=header_h,
+            pdf_resources.attach_image(c, header)
+            c.drawImage(header, x0, y1 - header_h, width=(x1 - x0), height=header_h,
                         preserveAspectRatio=True, anchor='sw')
             c.setLineWidth(1)
             c.line(x0, y1 - header_h, x1, y1 - header_h)
@@ -141,24 +157,25 @@ def print_ticket_pdf(ticket_id: int):
             y = y1 - mm(10)
     else:
         y = y1 - mm(10)
+    row1_top = y
 
     def box(x, top, w, h, lw=1):
-        c.setLineWidth(lw)
-        c.rect(x, top - h, w, h)
+        S.setLineWidth(lw)
+        S.rect(x, top - h, w, h)
 
-    def draw_center(x, top, w, h, text, size=11, bold=False, rtl=False, dy=0):
-        c.setFont(FONT_BOLD if bold else FONT_REG, size)
+    def draw_center(cv, x, top, w, h, text, size=11, bold=False, rtl=False, dy=0):
+        cv.setFont(FONT_BOLD if bold else FONT_REG, size)
         s = ar(text) if rtl else safe_str(text)
-        c.drawCentredString(x + w/2, (top - h/2) - 4 + dy, s)
+        cv.drawCentredString(x + w/2, (top - h/2) - 4 + dy, s)
 
-    def draw_left(x, top, w, h, text, size=11, bold=False, dy=0):
-        c.setFont(FONT_BOLD if bold else FONT_REG, size)
-        c.drawString(x + mm(2), (top - h/2) - 4 + dy, safe_str(text))
+    def draw_left(cv, x, top, w, h, text, size=11, bold=False, dy=0):
+        cv.setFont(FONT_BOLD if bold else FONT_REG, size)
+        cv.drawString(x + mm(2), (top - h/2) - 4 + dy, safe_str(text))
 
-    def draw_right(x, top, w, h, text, size=11, bold=False, rtl=False, dy=0):
-        c.setFont(FONT_BOLD if bold else FONT_REG, size)
+    def draw_right(cv, x, top, w, h, text, size=11, bold=False, rtl=False, dy=0):
+        cv.setFont(FONT_BOLD if bold else FONT_REG, size)
         s = ar(text) if rtl else safe_str(text)
-        c.drawRightString(x + w - mm(2), (top - h/2) - 4 + dy, s)
+        cv.drawRightString(x + w - mm(2), (top - h/2) - 4 + dy, s)
 
     # ===== Row 1 (Print + Title) =====
     row_h = mm(22)
@@ -166,64 +183,54 @@ def print_ticket_pdf(ticket_id: int):
 
     # left
     box(x0, y, col_w, row_h)
-    c.setFont(FONT_BOLD, 11)
-    c.drawString(x0 + mm(2), y - mm(6), "Print Time")
-    c.drawRightString(x0 + col_w - mm(2), y - mm(6), print_time)
-    c.drawString(x0 + mm(2), y - mm(14), "Print Date")
-    c.drawRightString(x0 + col_w - mm(2), y - mm(14), print_date)
+    S.setFont(FONT_BOLD, 11)
+    S.drawString(x0 + mm(2), y - mm(6), "Print Time")
+    S.drawString(x0 + mm(2), y - mm(14), "Print Date")
 
     # center title
     box(x0 + col_w, y, col_w, row_h)
-    c.setFillColorRGB(0.83, 0.47, 0.0)
-    c.setFont(FONT_BOLD, 16)
-    c.drawCentredString(x0 + col_w + col_w/2, y - mm(9), "General Maintenance")
-    c.setFont(FONT_BOLD, 14)
-    c.drawCentredString(x0 + col_w + col_w/2, y - mm(16), ar("الصيانة العامة"))
-    c.setFillColorRGB(0, 0, 0)
+    S.setFillColorRGB(0.83, 0.47, 0.0)
+    S.setFont(FONT_BOLD, 16)
+    S.drawCentredString(x0 + col_w + col_w/2, y - mm(9), "General Maintenance")
+    S.setFont(FONT_BOLD, 14)
+    S.drawCentredString(x0 + col_w + col_w/2, y - mm(16), ar("الصيانة العامة"))
+    S.setFillColorRGB(0, 0, 0)
 
     # right
     box(x0 + 2*col_w, y, col_w, row_h)
-    c.setFont(FONT_BOLD, 11)
-    c.drawRightString(x0 + 3*col_w - mm(2), y - mm(6), ar("وقت الطباعة"))
-    c.drawString(x0 + 2*col_w + mm(2), y - mm(6), print_time)
-    c.drawRightString(x0 + 3*col_w - mm(2), y - mm(14), ar("تاريخ الطباعة"))
-    c.drawString(x0 + 2*col_w + mm(2), y - mm(14), print_date)
+    S.setFont(FONT_BOLD, 11)
+    S.drawRightString(x0 + 3*col_w - mm(2), y - mm(6), ar("وقت الطباعة"))
+    S.drawRightString(x0 + 3*col_w - mm(2), y - mm(14), ar("تاريخ الطباعة"))
 
     y -= row_h
 
     # ===== Row 2 (Job info) =====
     row_h = mm(18)
     col = (x1 - x0) / 5
-    heads = [
-        ("Job Time", "وقت البلاغ", job_time),
-        ("Job Date", "تاريخ البلاغ", job_date),
-        ("Job No", "رقم أمر العمل", ticket_no),
-        ("Emp No", "الرقم الوظيفي", ""),     # لو لاحقاً تربطه من User
-        ("Requestor #", "التحويلة", requester_extension),
-    ]
-
-    for i, (en, ar_lbl, val) in enumerate(heads):
+    job_values = (job_time, job_date, ticket_no, emp_no, requester_extension)
+
+    for i, ((en, ar_lbl), val) in enumerate(zip(JOB_HEADS, job_values)):
         x = x0 + i * col
         box(x, y, col, row_h)
-        c.setFont(FONT_BOLD, 10)
-        c.drawCentredString(x + col/2, y - mm(6), en)
-        c.drawCentredString(x + col/2, y - mm(10), ar(ar_lbl))
+        S.setFont(FONT_BOLD, 10)
+        S.drawCentredString(x + col/2, y - mm(6), en)
+        S.drawCentredString(x + col/2, y - mm(10), ar(ar_lbl))
         if i == 2:
-            c.setFont(FONT_BOLD, 18)
-            c.drawCentredString(x + col/2, y - mm(15), safe_str(val))
+            V.setFont(FONT_BOLD, 18)
+            V.drawCentredString(x + col/2, y - mm(15), safe_str(val))
         else:
-            c.setFont(FONT_REG, 11)
-            c.drawCentredString(x + col/2, y - mm(15), safe_str(val))
+            V.setFont(FONT_REG, 11)
+            V.drawCentredString(x + col/2, y - mm(15), safe_str(val))
 
     y -= row_h
 
     # ===== Row 3 (User name) =====
     row_h = mm(14)
     box(x0, y, x1-x0, row_h)
-    c.setFont(FONT_BOLD, 11)
-    c.drawCentredString((x0+x1)/2, y - mm(6), "User Name / " + ar("اسم المستخدم"))
-    c.setFont(FONT_BOLD, 14)
-    c.drawCentredString((x0+x1)/2, y - mm(12), safe_str(requester_name))
+    S.setFont(FONT_BOLD, 11)
+    S.drawCentredString((x0+x1)/2, y - mm(6), "User Name / " + ar("اسم المستخدم"))
+    V.setFont(FONT_BOLD, 14)
+    V.drawCentredString((x0+x1)/2, y - mm(12), safe_str(user_name))
     y -= row_h
 
     # ===== Main table =====
@@ -240,30 +247,38 @@ def print_ticket_pdf(ticket_id: int):
         box(x0+w1+w2, y, w3, row_h)
         box(x0+w1+w2+w3, y, w4, row_h)
 
-        draw_left(x0, y, w1, row_h, en_label, 10, True)
+        draw_left(S, x0, y, w1, row_h, en_label, 10, True)
 
         if center_values:
-            draw_center(x0+w1, y, w2, row_h, en_val, 10, False)
-            draw_center(x0+w1+w2, y, w3, row_h, ar_val, 10, False, rtl=True)
+            draw_center(V, x0+w1, y, w2, row_h, en_val, 10, False)
+            draw_center(V, x0+w1+w2, y, w3, row_h, ar_val, 10, False, rtl=True)
         else:
-            draw_center(x0+w1, y, w2, row_h, en_val, 10, False)
-            draw_right(x0+w1+w2, y, w3, row_h, ar_val, 10, False, rtl=True)
+            draw_center(V, x0+w1, y, w2, row_h, en_val, 10, False)
+            draw_right(V, x0+w1+w2, y, w3, row_h, ar_val, 10, False, rtl=True)
 
-        draw_right(x0+w1+w2+w3, y, w4, row_h, ar_label, 10, True, rtl=True)
+        draw_right(S, x0+w1+w2+w3, y, w4, row_h, ar_label, 10, True, rtl=True)
         y -= row_h
 
+    def field(name):
+        # English value + its work_order.to_ar() translation (same as the HTML print)
+        return f.get(name, ""), f.get(name + "_ar", "")
+
     row("Caller Name", requester_name, requester_name, "اسم طالب الصيانة")
-    row("Caller Location", get_attr(building, "name", ""), get_attr(building, "name", ""), "موقع طالب الصيانة")
-    row("Section Name", get_attr(section, "name", ""), get_attr(section, "name", ""), "اسم القسم")
-    row("Floor Number", get_attr(floor, "name", ""), get_attr(floor, "name", ""), "رقم الطابق")
-    row("Office No / Name", get_attr(room, "name", ""), get_attr(room, "name", ""), "رقم / اسم المكتب")
-    row("Maintenance Type", maintenance_dept, maintenance_dept, "نوع الصيانة")
-    row("Error Name", error_name, error_name, "اسم العطل / المشكلة")
-    row("Job Priority", priority, priority, "درجة الأهمية")
-    row("Job Status", status, status, "حالة أمر العمل")
+    row("Caller Location", *field("building"), "موقع طالب الصيانة")
+    row("Section Name", *field("section"), "اسم القسم")
+    row("Floor Number", *field("floor"), "رقم الطابق")
+    row("Office No / Name", *field("room"), "رقم / اسم المكتب")
+    row("Maintenance Type", *field("maintenance_dept"), "نوع الصيانة")
+    row("Error Name", *field("error_name"), "اسم العطل / المشكلة")
+    row("Job Priority", *field("priority"), "درجة الأهمية")
+    row("Job Status", *field("status"), "حالة أمر العمل")
 
     # ✅ Error Desc centered
-    row("Error Desc", description, description, "وصف العطل", center_values=True)
+    row("Error Desc", *field("description"), "وصف العطل", center_values=True)
+
+    # ----- everything below is static -----
+    if not static:
+        return row1_top
 
     # ===== Spare parts (numbers start from TOP-LEFT) =====
     spare_h = mm(30)
@@ -310,19 +325,132 @@ def print_ticket_pdf(ticket_id: int):
     # ===== Signatures =====
     sig_h = mm(18)
     col = (x1-x0) / 4
-    sigs = ["رئيس قسم الصيانة العامة", "مشرف قسم الصيانة العامة", "مسؤول القسم", "الفني المختص"]
-    for i, lab in enumerate(sigs):
+    for i, lab in enumerate(SIGNATURES):
         box(x0 + i * col, y, col, sig_h)
         c.setFont(FONT_BOLD, 10)
         c.drawCentredString(x0 + i * col + col/2, y - sig_h/2 - 4, ar(lab))
 
+    return row1_top
+
+def _draw_stamp(c, top):
+    """Print time / date in row 1 as pdf_cache marks (same places as the labels)."""
+    margin = mm(8)
+    col_w = (pagesizes.A4[0] - 2 * margin) / 3
+    c.setFont(STAMP_FONT, 11)
+    for dy, mark, sample in ((mm(6), pdf_cache.TIME_MARK, "12:00 AM"),
+                             (mm(14), pdf_cache.DATE_MARK, "01/01/2000")):
+        # left column right-aligned on the real value's width, not the mark's
+        c.drawString(margin + col_w - mm(2) - pdfmetrics.stringWidth(sample, STAMP_FONT, 11), top - dy, mark)
+        c.drawString(margin + 2*col_w + mm(2), top - dy, mark)
+
+def build_layout(c, fonts, header):
+    """
+    Static layer -> form XObject LAYOUT_FORM in c's document (call before the first page),
+    print stamp -> STAMP_FORM (uncompressed, so pdf_cache.stamp() can patch it).
+    Stored once per PDF, each page just references them. Returns the top of row 1.
+    """
+    c.beginForm(LAYOUT_FORM)
+    top = _draw_layers(c, None, fonts, header, values=False)
+    c.endForm()
+
+    c.beginForm(STAMP_FORM)
+    _draw_stamp(c, top)
+    c.endForm(compression=0)
+    return top
+
+def draw_work_order(c, fields, fonts, layout_top):
+    """One A4 work order page from work_order.build() on top of build_layout()'s forms."""
+    c.doForm(LAYOUT_FORM)
+    c.doForm(STAMP_FORM)
+    _draw_layers(c, fields, fonts, None, static=False, top=layout_top)
     c.showPage()
+
+def render_unstamped(fields_list) -> bytes:
+    """work_order.build() list -> one PDF (a page each) with pdf_cache marks for the print time / date."""
+    fonts = register_fonts()
+    header = load_header()
+
+    buf = BytesIO()
+    c = canvas.Canvas(buf, pagesize=pagesizes.A4)
+    top = build_layout(c, fonts, header)
+    for fields in fields_list:
+        draw_work_order(c, fields, fonts, top)
     c.save()
+    return buf.getvalue()
+
+def render_work_orders(fields_list, stamp=None) -> BytesIO:
+    """work_order.build() list -> one PDF: fonts / header loaded once, static layout drawn once."""
+    print_time, print_date = stamp or print_stamp()
+    return BytesIO(pdf_cache.stamp(render_unstamped(fields_list), print_time, print_date))
+
+def render_chunk(fields_list, stamp) -> bytes:
+    """pdf_pool worker entry (separate process, no app / DB)."""
+    return render_work_orders(fields_list, stamp).getvalue()
+
+@bp.get("/tickets/<int:ticket_id>/print.pdf")
+@login_required
+def print_ticket_pdf(ticket_id: int):
+    t = Ticket.query.get(ticket_id)
+    if not t:
+        abort(404)
+
+    # ✅ reprint of an unchanged ticket -> cached PDF + print stamp, no ReportLab
+    fields = work_order.build(t, current_user)
+    key = pdf_cache.key(TEMPLATE_VERSION, fields, pdf_resources.files_key("header.png"))
+    data = pdf_cache.get(key)
+    if data is None:
+        data = render_unstamped([fields])
+        pdf_cache.put(key, data)
 
-    buf.seek(0)
     return send_file(
-        buf,
+        BytesIO(pdf_cache.stamp(data, *print_stamp())),
         mimetype="application/pdf",
         as_attachment=False,
         download_name=f"work_order_{ticket_id}.pdf"
     )
+
+@bp.get("/tickets/print.pdf")
+@login_required
+def print_tickets_pdf():
+    """
+    Batch print: /tickets/print.pdf?ids=1,2,3 (or ids=1&ids=2) -> one multi-page PDF,
+    pages in the given order. All tickets in one query.
+    Large batches -> pdf_pool (chunks on other cores); 503 when its queue is full.
+    """
+    ids = []
+    for raw in request.args.getlist("ids"):
+        for x in raw.split(","):
+            x = x.strip()
+            if x.isdigit() and int(x) not in ids:
+                ids.append(int(x))
+    if not ids:
+        abort(400)
+    if len(ids) > PRINT_BATCH_MAX:
+        abort(413)
+
+    by_id = {t.id: t for t in Ticket.query.filter(Ticket.id.in_(ids)).all()}
+    tickets = [by_id[i] for i in ids if i in by_id]
+    if not tickets:
+        abort(404)
+
+    fields_list = [work_order.build(t, current_user) for t in tickets]
+    try:
+        if pdf_pool.should_use(len(fields_list)):
+            buf = pdf_pool.render(render_chunk, fields_list, print_stamp())
+        else:
+            buf = render_work_orders(fields_list)
+    except pdf_pool.PoolBusy:
+        resp = make_response("Print queue is full, please retry in a few seconds.", 503)
+        resp.headers["Retry-After"] = str(pdf_pool.RETRY_AFTER)
+        return resp
+    except pdf_pool.PoolTimeout:
+        resp = make_response("Print took too long, please retry with fewer tickets.", 503)
+        resp.headers["Retry-After"] = str(pdf_pool.RETRY_AFTER)
+        return resp
+
+    return send_file(
+        buf,
+        mimetype="application/pdf",
+        as_attachment=False,
+        download_name=f"work_orders_{len(tickets)}.pdf"
+    )
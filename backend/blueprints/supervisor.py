@@ -4,6 +4,9 @@ from flask_login import login_required, current_user
 from sqlalchemy import func
 from db import db
 from models import Ticket, User, TicketUpdate, STATUSES, PRIORITIES, SLA_HOURS
+from blueprints.kpi import invalidate_kpi_cache
+from blueprints.dashboard import publish_ticket_event
+import ticket_search
 
 bp = Blueprint("supervisor", __name__)
 
@@ -30,13 +33,20 @@ def inbox():
     if priority:
         query = query.filter(Ticket.priority == priority)
 
+    ranked_q = None
     if q:
         if q.isdigit():
             query = query.filter(Ticket.ticket_no == int(q))
+        elif ticket_search.available(db.session.get_bind()):
+            # ✅ FTS5: prefix / Arabic-normalized match, best match first
+            ranked_q = ticket_search.ranked(query, q)
         else:
             query = query.filter(Ticket.title.ilike(f"%{q}%"))
 
-    tickets = query.order_by(Ticket.created_at.desc()).all()
+    if ranked_q is not None:
+        tickets = ranked_q.all()
+    else:
+        tickets = query.order_by(Ticket.created_at.desc()).all()
 
     technicians = User.query.filter_by(
         role="technician",
@@ -97,6 +107,8 @@ def assign(ticket_id):
     )
     db.session.add(upd)
     db.session.commit()
+    invalidate_kpi_cache(t.maintenance_dept)
+    publish_ticket_event("status_changed", t)
 
     flash("Technician assigned successfully", "success")
     return redirect(url_for("supervisor.inbox"))
@@ -129,6 +141,8 @@ def change_status(ticket_id):
     )
     db.session.add(upd)
     db.session.commit()
+    invalidate_kpi_cache(t.maintenance_dept)
+    publish_ticket_event("status_changed", t)
 
     flash("Status updated", "success")
     return redirect(url_for("supervisor.inbox"))
@@ -155,6 +169,8 @@ def close(ticket_id):
     )
     db.session.add(upd)
     db.session.commit()
+    invalidate_kpi_cache(t.maintenance_dept)
+    publish_ticket_event("closed", t)
 
     flash("Ticket closed successfully", "success")
     return redirect(url_for("supervisor.inbox"))
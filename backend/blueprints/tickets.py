@@ -1,13 +1,16 @@
 from datetime import datetime
-from flask import Blueprint, render_template, request, redirect, url_for, jsonify, flash
+from flask import Blueprint, render_template, request, redirect, url_for, jsonify, flash, current_app
 from flask_login import login_required, current_user
-from sqlalchemy import func
 
 from db import db
 from models import (
     Building, Floor, HospitalSection, Room,
     Ticket, TicketUpdate, MAINT_DEPTS, PRIORITIES, STATUSES
 )
+from blueprints.kpi import invalidate_kpi_cache
+from blueprints.dashboard import publish_ticket_event
+import location_registry
+import ticket_numbers
 
 bp = Blueprint("tickets", __name__)
 
@@ -106,13 +109,10 @@ def create_ticket():
             flash("Selected location is invalid. Please re-select.", "danger")
             return redirect(url_for("tickets.create_ticket"))
 
-        last_no = db.session.query(func.max(Ticket.ticket_no)).scalar()
-        next_no = 1 if last_no is None else int(last_no) + 1
-
         try:
             now = datetime.utcnow()
             t = Ticket(
-                ticket_no=next_no,
+                ticket_no=ticket_numbers.next_ticket_no(),
                 requester_user_id=current_user.id,
                 requester_name=requester_name,
                 requester_extension=requester_extension,
@@ -120,6 +120,7 @@ def create_ticket():
                 floor_id=floor_id,
                 section_id=section_id,
                 room_id=room_id,
+                location_path=location_registry.join_path(b.name, f.name, s.name, r.name),
                 maintenance_dept=maintenance_dept,
                 priority=priority,
                 error_name=error_name,
@@ -143,6 +144,8 @@ def create_ticket():
             ))
 
             db.session.commit()
+            invalidate_kpi_cache(t.maintenance_dept)
+            publish_ticket_event("created", t)
 
         except Exception as e:
             db.session.rollback()
@@ -167,10 +170,7 @@ def ticket_detail(ticket_id: int):
 
     t = Ticket.query.get_or_404(ticket_id)
 
-    building = Building.query.get(t.building_id)
-    floor = Floor.query.get(t.floor_id)
-    section = HospitalSection.query.get(t.section_id)
-    room = Room.query.get(t.room_id)
+    building, floor, section, room = location_registry.for_ticket(t)
 
     return render_template(
         "ticket_detail.html",
@@ -268,6 +268,8 @@ def ticket_quick_update(ticket_id: int):
                 created_at=now
             ))
             db.session.commit()
+            invalidate_kpi_cache(t.maintenance_dept)
+            publish_ticket_event("closed", t)
             flash("Ticket closed.", "success")
             return redirect(return_to)
 
@@ -296,6 +298,8 @@ def ticket_quick_update(ticket_id: int):
         ))
 
         db.session.commit()
+        invalidate_kpi_cache(t.maintenance_dept)
+        publish_ticket_event("status_changed", t)
         flash("Status updated.", "success")
         return redirect(return_to)
 
@@ -329,6 +333,13 @@ def tickets_bulk_update():
         flash("No tickets selected.", "warning")
         return redirect(return_to)
 
+    # ✅ print = read-only -> one multi-page PDF (no update permission needed)
+    if action == "print":
+        if "printing_pdf" not in current_app.blueprints:
+            flash("PDF printing is not available.", "warning")
+            return redirect(return_to)
+        return redirect(url_for("printing_pdf.print_tickets_pdf", ids=",".join(map(str, ids))))
+
     # load tickets
     tickets = Ticket.query.filter(Ticket.id.in_(ids)).all()
 
@@ -347,6 +358,7 @@ def tickets_bulk_update():
                 return redirect(return_to)
 
             changed = 0
+            changed_tickets = []
             for t in tickets:
                 if t.status == status:
                     continue
@@ -363,13 +375,17 @@ def tickets_bulk_update():
                     created_at=now
                 ))
                 changed += 1
+                changed_tickets.append(t)
 
             db.session.commit()
+            invalidate_kpi_cache(*{t.maintenance_dept for t in tickets})
+            publish_ticket_event("status_changed", *changed_tickets)
             flash(f"Bulk status updated ({changed}).", "success")
             return redirect(return_to)
 
         if action == "close":
             closed = 0
+            closed_tickets = []
             skipped = 0
             for t in tickets:
                 if t.status not in ("executed", "cancelled"):
@@ -390,8 +406,11 @@ def tickets_bulk_update():
                     created_at=now
                 ))
                 closed += 1
+                closed_tickets.append(t)
 
             db.session.commit()
+            invalidate_kpi_cache(*{t.maintenance_dept for t in tickets})
+            publish_ticket_event("closed", *closed_tickets)
             if skipped:
                 flash(f"Closed {closed} (skipped {skipped} not executed/cancelled).", "warning")
             else:
@@ -0,0 +1,138 @@
+# check_locations.py
+"""
+Rename / delete check for locations (blueprints/locations.py -> location_registry + ticket_search).
+
+- ينشئ DB مؤقتة فيها مكانين وبلاغ في كل مكان
+- rename للـ section والـ room ثم delete للـ room والـ building عن طريق POST /locations/*
+- بعد كل خطوة: Ticket.location_path = المسار من الأماكن الموجودة فعلاً،
+  والبحث (/api/dashboard/tickets?q=) بيلاقي الاسم الجديد ومش بيلاقي القديم / المحذوف
+- البلاغ اللي في المكان التاني مايتأثرش
+- يفشل (exit 1) عند أي اختلاف
+
+Run:
+    python check_locations.py
+"""
+import os
+import sys
+import tempfile
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+DB_PATH = os.path.join(tempfile.gettempdir(), "maintenance_locations_check.db")
+
+PASSWORD = "locations-check"
+
+
+def main():
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(DB_PATH + suffix):
+            os.remove(DB_PATH + suffix)
+    os.environ.pop("DATABASE_URL", None)  # always the temp SQLite file
+    os.environ["MAINT_DB_PATH"] = DB_PATH
+
+    from app import create_app
+    from db import db
+    from models import User, Ticket, Building, Floor, HospitalSection, Room
+
+    app = create_app()
+    if "locations" not in app.blueprints:
+        from blueprints.locations import bp as locations_bp
+        app.register_blueprint(locations_bp)
+
+    def add_location(building, floor, section, room):
+        b = Building(name=building)
+        db.session.add(b)
+        db.session.flush()
+        f = Floor(building_id=b.id, name=floor)
+        db.session.add(f)
+        db.session.flush()
+        s = HospitalSection(building_id=b.id, floor_id=f.id, name=section)
+        db.session.add(s)
+        db.session.flush()
+        r = Room(building_id=b.id, floor_id=f.id, section_id=s.id, name=room)
+        db.session.add(r)
+        db.session.flush()
+        return b, f, s, r
+
+    with app.app_context():
+        u = User(username="locations", full_name="locations", role="admin", is_active=True)
+        u.set_password(PASSWORD)
+        db.session.add(u)
+        db.session.commit()
+        ids = {}
+        for key, names in (("a", ("B1", "F1", "Radiology", "Zebraroom")),
+                           ("b", ("B2", "F2", "Pharmacy", "Lionroom"))):
+            b, f, s, r = add_location(*names)
+            ids[key] = {"building": b.id, "floor": f.id, "section": s.id, "room": r.id}
+        db.session.commit()
+
+    client = app.test_client()
+    client.post("/login", data={"username": "locations", "password": PASSWORD})
+    tickets = {}
+    for key in ("a", "b"):
+        loc = ids[key]
+        res = client.post("/tickets/create", data={
+            "requester_name": "Ward",
+            "building_id": loc["building"], "floor_id": loc["floor"],
+            "section_id": loc["section"], "room_id": loc["room"],
+            "maintenance_dept": "hvac", "priority": "high",
+            "title": "Location check", "description": "check_locations",
+        })
+        if res.status_code != 302:
+            print(f"[FAIL] create ticket: HTTP {res.status_code}")
+            sys.exit(1)
+    with app.app_context():
+        for key in ("a", "b"):
+            tickets[key] = Ticket.query.filter_by(room_id=ids[key]["room"]).one().id
+
+    failed = []
+
+    def post(action, kind, key, **extra):
+        res = client.post(f"/locations/{action}", data=dict(kind=kind, id=ids[key][kind], **extra))
+        if res.status_code != 302:
+            failed.append(f"{action} {kind}: HTTP {res.status_code}")
+
+    def search(q):
+        res = client.get("/api/dashboard/tickets", query_string={"q": q, "view": "all"})
+        return {item["id"] for item in res.get_json()["items"]}
+
+    def expect(step, key, path, found=(), gone=()):
+        with app.app_context():
+            got = db.session.get(Ticket, tickets[key]).location_path
+        print(f"[{step}] ticket {key}: {got!r}")
+        if got != path:
+            failed.append(f"{step}: ticket {key} location_path {got!r}, expected {path!r}")
+        for q in found:
+            if tickets[key] not in search(q):
+                failed.append(f"{step}: search {q!r} misses ticket {key}")
+        for q in gone:
+            if tickets[key] in search(q):
+                failed.append(f"{step}: search {q!r} still finds ticket {key}")
+
+    expect("create", "a", "B1 / F1 / Radiology / Zebraroom", found=("zebra",))
+
+    post("rename", "section", "a", name="Imaging")
+    expect("rename section", "a", "B1 / F1 / Imaging / Zebraroom", found=("imaging",), gone=("radiology",))
+
+    post("rename", "room", "a", name="Okapiroom")
+    expect("rename room", "a", "B1 / F1 / Imaging / Okapiroom", found=("okapi",), gone=("zebra",))
+
+    post("delete", "room", "a")
+    expect("delete room", "a", "B1 / F1 / Imaging", found=("imaging",), gone=("okapi",))
+
+    post("delete", "building", "b")
+    expect("delete building", "b", "F2 / Pharmacy / Lionroom", found=("lion",), gone=("b2",))
+    expect("other location", "a", "B1 / F1 / Imaging")
+
+    if failed:
+        for msg in failed:
+            print(f"[FAIL] {msg}")
+        sys.exit(1)
+
+    print("[OK] Ticket paths and search index follow location rename / delete.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+# check_query_plans.py
+"""
+Query-plan regression check for the Ticket table.
+
+- ينشئ DB مؤقتة ويملأها بعدد كبير من البلاغات (افتراضي 500k)
+- يفتح صفحات dashboard / kpi / supervisor inbox الحقيقية
+- يلتقط كل SQL على جدول ticket ويشغل EXPLAIN QUERY PLAN عليه
+- يفشل (exit 1) لو أي Query عمل full table scan على ticket
+
+Run:
+    python check_query_plans.py
+    set PLAN_TICKETS=50000 && python check_query_plans.py
+"""
+import os
+import re
+import sys
+import random
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+TICKETS = int(os.environ.get("PLAN_TICKETS", "500000"))
+DB_PATH = os.path.join(tempfile.gettempdir(), "maintenance_plan_check.db")
+
+# plain table scan (no index) on ticket = regression
+FULL_SCAN_RE = re.compile(r"^SCAN (TABLE )?ticket\b(?!.*USING)")
+
+PASSWORD = "plan-check"
+
+
+def _ts(dt: datetime) -> str:
+    # same storage format SQLAlchemy uses for SQLite DateTime
+    return dt.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def seed(db_file: str, n: int):
+    from models import MAINT_DEPTS, PRIORITIES, STATUSES, sla_due_at_for
+
+    conn = sqlite3.connect(db_file)
+    try:
+        cur = conn.cursor()
+        cur.execute("INSERT INTO building (id, name) VALUES (1, 'Main Building')")
+        cur.execute("INSERT INTO floor (id, building_id, name) VALUES (1, 1, 'Ground')")
+        cur.execute("INSERT INTO hospital_section (id, building_id, floor_id, name) VALUES (1, 1, 1, 'ICU')")
+        cur.execute("INSERT INTO room (id, building_id, floor_id, section_id, name) VALUES (1, 1, 1, 1, 'Room 1')")
+
+        random.seed(42)
+        now = datetime.utcnow()
+        batch = []
+        for i in range(1, n + 1):
+            c_at = now - timedelta(minutes=random.randint(0, 60 * 24 * 730))
+            pri = random.choice(PRIORITIES)
+            st = random.choice(STATUSES)
+            closed_at = _ts(c_at + timedelta(hours=random.randint(1, 96))) if st == "closed" else None
+            due = sla_due_at_for(pri, c_at)
+            batch.append((
+                i, 1, f"Caller {i}", 1, 1, 1, 1,
+                random.choice(MAINT_DEPTS), pri, f"Job {i}", "seeded", st,
+                closed_at, _ts(c_at), _ts(c_at), _ts(due) if due else None,
+            ))
+            if len(batch) >= 20000:
+                _insert(cur, batch)
+                batch = []
+        if batch:
+            _insert(cur, batch)
+
+        conn.commit()
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+
+
+def _insert(cur, batch):
+    cur.executemany(
+        """INSERT INTO ticket (
+               ticket_no, requester_user_id, requester_name,
+               building_id, floor_id, section_id, room_id,
+               maintenance_dept, priority, title, description, status,
+               closed_at, created_at, updated_at, sla_due_at
+           ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        batch,
+    )
+
+
+def main():
+    if os.path.exists(DB_PATH):
+        os.remove(DB_PATH)
+    os.environ.pop("DATABASE_URL", None)  # always the temp SQLite file
+    os.environ["MAINT_DB_PATH"] = DB_PATH
+
+    from sqlalchemy import event
+    from app import create_app
+    from db import db
+    from models import User
+
+    app = create_app()
+
+    if "supervisor" not in app.blueprints:
+        from blueprints.supervisor import bp as supervisor_bp
+        app.register_blueprint(supervisor_bp)
+
+    with app.app_context():
+        for username, role, dept in (("plan_admin", "admin", None), ("plan_sup", "supervisor", "hvac")):
+            u = User(username=username, full_name=username, role=role, maintenance_dept=dept, is_active=True)
+            u.set_password(PASSWORD)
+            db.session.add(u)
+        db.session.commit()
+
+    print(f"[SEED] {TICKETS} tickets -> {DB_PATH}")
+    seed(DB_PATH, TICKETS)
+
+    today = datetime.utcnow().date()
+    month_start = today.replace(day=1).isoformat()
+    year_ago = (today - timedelta(days=365)).isoformat()
+
+    scenarios = [
+        ("plan_admin", "/dashboard"),
+        ("plan_admin", "/dashboard?view=over_sla"),
+        ("plan_admin", "/dashboard?view=closed_today"),
+        ("plan_admin", "/dashboard?view=all&all=1"),
+        ("plan_admin", f"/dashboard?view=all&dept=hvac&from={year_ago}&to={today.isoformat()}"),
+        ("plan_admin", "/api/dashboard/tickets?view=open&all=1&per=100"),
+        ("plan_admin", "/dashboard?view=all&all=1&after=20200101000000000000-250000"),
+        ("plan_admin", "/dashboard?view=open&all=1&before=20240101000000000000-1"),
+        ("plan_admin", "/dashboard?view=all&all=1&q=Job 12"),
+        ("plan_sup", "/supervisor/inbox?q=Job"),
+        ("plan_admin", f"/kpi?from={month_start}&to={today.isoformat()}"),
+        ("plan_admin", f"/kpi?from={year_ago}&to={today.isoformat()}&dept=hvac"),
+        ("plan_sup", "/supervisor/inbox?status=new"),
+    ]
+
+    captured = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        if re.search(r"\bticket\b", statement) and statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", _capture)
+
+    failures = []
+    raw = sqlite3.connect(DB_PATH)
+    try:
+        for username, url in scenarios:
+            client = app.test_client()
+            client.post("/login", data={"username": username, "password": PASSWORD})
+
+            captured.clear()
+            res = client.get(url)
+            if res.status_code != 200:
+                failures.append((url, f"HTTP {res.status_code}", ""))
+                continue
+
+            for statement, params in captured:
+                plan = raw.execute("EXPLAIN QUERY PLAN " + statement, params or ()).fetchall()
+                details = [row[-1] for row in plan]
+                bad = [d for d in details if FULL_SCAN_RE.search(d)]
+                if bad:
+                    failures.append((url, "; ".join(details), " ".join(statement.split())[:300]))
+
+            print(f"[OK] {url} ({len(captured)} queries)" if not any(f[0] == url for f in failures) else f"[FAIL] {url}")
+    finally:
+        raw.close()
+
+    if failures:
+        print("========================================")
+        for url, plan, sql in failures:
+            print("[FULL SCAN]", url)
+            print("   plan:", plan)
+            print("   sql :", sql)
+        print("========================================")
+        sys.exit(1)
+
+    print("[OK] No full table scans on ticket.")
+
+
+if __name__ == "__main__":
+    main()
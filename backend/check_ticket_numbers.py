@@ -0,0 +1,117 @@
+# check_ticket_numbers.py
+"""
+Concurrency check for ticket number allocation (ticket_numbers.py).
+
+- ينشئ DB مؤقتة ويعمل آلاف POST /tickets/create بالتوازي (threads)
+- يتأكد إن كل طلب اتسجل، ومفيش ticket_no متكرر
+- يفشل (exit 1) لو فيه رقم متكرر أو بلاغ ناقص
+
+Run:
+    python check_ticket_numbers.py
+    set NUMBERS_CREATES=5000 && set NUMBERS_THREADS=32 && python check_ticket_numbers.py
+    set TICKET_NO_BLOCK=50 && python check_ticket_numbers.py
+"""
+import os
+import sys
+import tempfile
+import threading
+from time import perf_counter
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+CREATES = int(os.environ.get("NUMBERS_CREATES", "2000"))
+THREADS = int(os.environ.get("NUMBERS_THREADS", "16"))
+DB_PATH = os.path.join(tempfile.gettempdir(), "maintenance_numbers_check.db")
+
+PASSWORD = "numbers-check"
+
+
+def main():
+    if os.path.exists(DB_PATH):
+        os.remove(DB_PATH)
+    os.environ.pop("DATABASE_URL", None)  # always the temp SQLite file
+    os.environ["MAINT_DB_PATH"] = DB_PATH
+
+    from sqlalchemy import func
+    from app import create_app
+    from db import db
+    from models import User, Ticket, Building, Floor, HospitalSection, Room
+
+    app = create_app()
+
+    with app.app_context():
+        u = User(username="numbers", full_name="numbers", role="admin", is_active=True)
+        u.set_password(PASSWORD)
+        db.session.add(u)
+        b = Building(name="Main Building")
+        db.session.add(b)
+        db.session.flush()
+        f = Floor(building_id=b.id, name="Ground")
+        db.session.add(f)
+        db.session.flush()
+        s = HospitalSection(building_id=b.id, floor_id=f.id, name="ICU")
+        db.session.add(s)
+        db.session.flush()
+        r = Room(building_id=b.id, floor_id=f.id, section_id=s.id, name="Room 1")
+        db.session.add(r)
+        db.session.commit()
+        form = {
+            "requester_name": "Ward",
+            "building_id": b.id, "floor_id": f.id, "section_id": s.id, "room_id": r.id,
+            "maintenance_dept": "hvac", "priority": "high",
+            "title": "Concurrent create", "description": "check_ticket_numbers",
+        }
+
+    errors = []
+    per_thread = [CREATES // THREADS + (1 if i < CREATES % THREADS else 0) for i in range(THREADS)]
+
+    def worker(n):
+        client = app.test_client()
+        client.post("/login", data={"username": "numbers", "password": PASSWORD})
+        for _ in range(n):
+            try:
+                res = client.post("/tickets/create", data=form)
+                if res.status_code != 302 or "/tickets/create" in res.headers.get("Location", ""):
+                    with client.session_transaction() as sess:
+                        msgs = [m for _, m in sess.pop("_flashes", [])]
+                    errors.append("; ".join(msgs) or f"HTTP {res.status_code}")
+            except Exception as e:
+                errors.append(repr(e))
+
+    print(f"[RUN] {CREATES} creates on {THREADS} threads -> {DB_PATH}")
+    started = perf_counter()
+    threads = [threading.Thread(target=worker, args=(n,)) for n in per_thread]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = perf_counter() - started
+
+    with app.app_context():
+        total = Ticket.query.count()
+        distinct = db.session.query(func.count(func.distinct(Ticket.ticket_no))).scalar()
+        lo, hi = db.session.query(func.min(Ticket.ticket_no), func.max(Ticket.ticket_no)).first()
+
+    print(f"[RESULT] {total} tickets, {distinct} distinct numbers, range {lo}..{hi}, "
+          f"{elapsed:.1f}s ({CREATES / elapsed:.0f}/s)")
+
+    failed = False
+    if errors:
+        print(f"[FAIL] {len(errors)} request errors, e.g. {errors[0]}")
+        failed = True
+    if total != CREATES:
+        print(f"[FAIL] expected {CREATES} tickets, got {total}")
+        failed = True
+    if distinct != total:
+        print(f"[FAIL] duplicate ticket numbers: {total - distinct}")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+    print("[OK] All tickets created with unique numbers.")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,12 +9,36 @@ except Exception:
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 
+def _database_url() -> str:
+    url = os.environ.get("DATABASE_URL", "").strip()
+    if url.startswith("postgres://"):
+        # Heroku-style scheme -> SQLAlchemy name
+        url = "postgresql://" + url[len("postgres://"):]
+    return url
+
+
+def engine_options(uri: str) -> dict:
+    # SQLite: الـ pool الافتراضي كفاية (writer واحد)، والـ pragmas في sqlite_profile.py
+    if uri.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": int(os.environ.get("DB_POOL_SIZE", "10")),
+        "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", "20")),
+        "pool_timeout": int(os.environ.get("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": True,
+    }
+
+
 class Config:
     SECRET_KEY = os.environ.get("SECRET_KEY", "dev-secret-key")
 
-    SQLALCHEMY_DATABASE_URI = os.environ.get(
-        "DATABASE_URL",
+    # DATABASE_URL (PostgreSQL / ...) وإلا SQLite (create_app بتحدد المسار من MAINT_DB_PATH)
+    DATABASE_URL = _database_url()
+
+    SQLALCHEMY_DATABASE_URI = DATABASE_URL or (
         "sqlite:///" + os.path.join(BASE_DIR, "maintenance.db").replace("\\", "/")
     )
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
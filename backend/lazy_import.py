@@ -0,0 +1,61 @@
+# lazy_import.py
+"""
+Import-on-first-use for heavy optional dependencies (reportlab / arabic_reshaper / bidi / pypdf).
+
+- lazy("reportlab.pdfgen.canvas") بيرجع proxy؛ الـ import الحقيقي مع أول attribute
+  -> create_app / worker restart مابيدفعوش تمنه، أول طباعة بس
+- require(): find_spec بس (من غير import) -> الـ blueprint لسه بيتعمله SKIP لو الـ package مش متسطب
+- loaded(): {module: ms} للي اتحمل فعلاً (بيتطبع [LAZY] أول مرة)
+"""
+import importlib
+import importlib.util
+import threading
+from time import perf_counter
+
+_lock = threading.RLock()
+_loaded = {}
+
+
+class LazyModule:
+    """Module proxy: importlib.import_module(name) on first attribute access."""
+    __slots__ = ("_name", "_module")
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        mod = self._module
+        if mod is None:
+            with _lock:
+                mod = self._module
+                if mod is None:
+                    t0 = perf_counter()
+                    mod = importlib.import_module(self._name)
+                    ms = (perf_counter() - t0) * 1000
+                    _loaded[self._name] = ms
+                    print(f"[LAZY] {self._name} loaded in {ms:.1f} ms")
+                    self._module = mod
+        return mod
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy(name: str) -> LazyModule:
+    return LazyModule(name)
+
+
+def require(*names):
+    """ImportError now if a top-level package is missing (nothing gets imported)."""
+    for name in names:
+        if importlib.util.find_spec(name) is None:
+            raise ImportError(f"No module named {name!r}")
+
+
+def loaded() -> dict:
+    return dict(_loaded)
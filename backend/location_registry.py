@@ -0,0 +1,155 @@
+# location_registry.py
+"""
+Process-wide location lookup (Building / Floor / HospitalSection / Room).
+
+- بيتحمل مرة واحدة من الـ DB وبعدها كل الـ lookups من الذاكرة O(1)
+- versioned: أي add/delete في blueprints/locations.py بينادي invalidate()
+- LOCATION_REGISTRY_MAX_AGE: reload دوري عشان باقي الـ workers يشوفوا التعديل
+- Ticket.location_path: "Building / Floor / Section / Room" متخزن على البلاغ
+  (search / listing من غير joins)، بيتحدث بـ refresh_ticket_paths() بعد rename / delete
+- rooms_under() لازم يتنادى قبل الـ delete: بعده الـ room rows مش موجودة ومش هنلاقي البلاغات
+- المسار من ids البلاغ نفسه (LEFT JOIN) -> الجزء المحذوف بيختفي زي for_ticket() بالظبط
+"""
+import os
+import threading
+from collections import namedtuple
+from time import monotonic
+
+from sqlalchemy import text
+
+from models import Building, Floor, HospitalSection, Room
+
+Location = namedtuple("Location", ["id", "name"])
+
+KINDS = {
+    "building": Building,
+    "floor": Floor,
+    "section": HospitalSection,
+    "room": Room,
+}
+
+SEP = " / "
+
+# room row carries its parents -> rooms under a location, tickets matched by room_id (ix_ticket_room)
+_ROOM_COL = {"building": "building_id", "floor": "floor_id", "section": "section_id", "room": "id"}
+_IN_BATCH = 500
+
+MAX_AGE = int(os.environ.get("LOCATION_REGISTRY_MAX_AGE", "300"))  # seconds
+
+_lock = threading.Lock()
+_version = 0
+_loaded_version = -1
+_loaded_at = 0.0
+_maps = {kind: {} for kind in KINDS}
+
+
+def invalidate():
+    """Call after any location add/delete/rename."""
+    global _version
+    with _lock:
+        _version += 1
+
+
+def version() -> int:
+    return _version
+
+
+def _maps_current():
+    global _loaded_version, _loaded_at, _maps
+
+    if _loaded_version == _version and (monotonic() - _loaded_at) < MAX_AGE:
+        return _maps
+
+    with _lock:
+        if _loaded_version != _version or (monotonic() - _loaded_at) >= MAX_AGE:
+            fresh = {}
+            for kind, model in KINDS.items():
+                fresh[kind] = {
+                    row_id: Location(row_id, name)
+                    for row_id, name in model.query.with_entities(model.id, model.name).all()
+                }
+            _maps = fresh
+            _loaded_version = _version
+            _loaded_at = monotonic()
+        return _maps
+
+
+def get(kind: str, item_id):
+    """Location(id, name) or None."""
+    if item_id is None:
+        return None
+    return _maps_current()[kind].get(item_id)
+
+
+def name(kind: str, item_id, default=None):
+    loc = get(kind, item_id)
+    return loc.name if loc else default
+
+
+def for_ticket(t):
+    """(building, floor, section, room) for a ticket, without touching the DB."""
+    maps = _maps_current()
+    return (
+        maps["building"].get(t.building_id),
+        maps["floor"].get(t.floor_id),
+        maps["section"].get(t.section_id),
+        maps["room"].get(t.room_id),
+    )
+
+
+def join_path(*names) -> str:
+    return SEP.join(n for n in names if n)
+
+
+def path(building_id, floor_id, section_id, room_id) -> str:
+    """Location label from the in-memory maps (same format as Ticket.location_path)."""
+    return join_path(*(loc.name for loc in (
+        get("building", building_id), get("floor", floor_id),
+        get("section", section_id), get("room", room_id),
+    ) if loc))
+
+
+def rooms_under(conn, kind: str, item_id) -> list:
+    """Room ids under a location (the room itself for kind "room"); call before deleting it."""
+    if kind == "room":
+        return [item_id]
+    return [r for (r,) in conn.execute(
+        text(f"SELECT id FROM room WHERE {_ROOM_COL[kind]} = :loc"), {"loc": item_id})]
+
+
+def _id_batches(ids):
+    ids = list(ids)
+    for i in range(0, len(ids), _IN_BATCH):
+        chunk = ids[i:i + _IN_BATCH]
+        yield ", ".join(f":id{n}" for n in range(len(chunk))), {f"id{n}": v for n, v in enumerate(chunk)}
+
+
+def refresh_ticket_paths(conn, room_ids=None) -> int:
+    """
+    Rewrite Ticket.location_path for tickets in room_ids (every ticket when None).
+    Names come from the ticket's own building / floor / section / room ids read on conn
+    -> sees an uncommitted rename / delete in the same transaction.
+    """
+    sql = (
+        "SELECT DISTINCT t.building_id, t.floor_id, t.section_id, t.room_id, "
+        "b.name, f.name, s.name, r.name FROM ticket t "
+        "LEFT JOIN building b ON b.id = t.building_id "
+        "LEFT JOIN floor f ON f.id = t.floor_id "
+        "LEFT JOIN hospital_section s ON s.id = t.section_id "
+        "LEFT JOIN room r ON r.id = t.room_id"
+    )
+    if room_ids is None:
+        batches = [(sql, {})]
+    else:
+        batches = [(f"{sql} WHERE t.room_id IN ({marks})", params) for marks, params in _id_batches(room_ids)]
+
+    total = 0
+    for query, params in batches:
+        for b_id, f_id, s_id, r_id, *names in conn.execute(text(query), params).all():
+            res = conn.execute(
+                text("UPDATE ticket SET location_path = :p WHERE room_id = :r "
+                     "AND building_id = :b AND floor_id = :f AND section_id = :s"),
+                {"p": join_path(*names), "r": r_id, "b": b_id, "f": f_id, "s": s_id},
+            )
+            total += res.rowcount or 0
+    return total
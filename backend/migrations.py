@@ -0,0 +1,232 @@
+# migrations.py
+"""
+Versioned schema migrations (schema_version table).
+
+- startup = query واحد: SELECT max(version) FROM schema_version
+  لو = LATEST خلاص، غير كده بننفذ الـ migrations الناقصة بالترتيب
+- DB جديدة: create_all وبعدين كل الـ migrations (سريعة على DB فاضية، وبتعمل اللي
+  create_all مابيعملوش زي ticket_fts)
+- كل migration idempotent (DBs قديمة ممكن تكون اتعدلت بالـ scripts القديمة)
+- online: ADD COLUMN nullable من غير default (مفيش table rewrite)،
+  indexes بـ CREATE INDEX CONCURRENTLY على PostgreSQL، والـ backfill على دفعات
+- جدول جديد / عمود جديد / index جديد = migration جديدة في آخر MIGRATIONS
+
+Run (upgrade + status):
+    python migrations.py
+"""
+from datetime import datetime
+
+from sqlalchemy import inspect, text, select, func, bindparam
+
+from db import db
+from models import SchemaVersion, Ticket, sla_due_at_for
+import location_registry
+import ticket_search
+
+BACKFILL_BATCH = 5000
+
+
+# -------------------------
+# helpers
+# -------------------------
+def _add_columns(conn, table, cols):
+    """
+    cols: [(name, extra_sql)] -> ALTER TABLE .. ADD COLUMN for the missing ones,
+    type compiled from the model for the current dialect.
+    """
+    have = {c["name"] for c in inspect(conn).get_columns(table.name)}
+    for name, extra in cols:
+        if name in have:
+            continue
+        coltype = table.c[name].type.compile(dialect=conn.dialect)
+        conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {name} {coltype}{extra}"))
+        print(f"[DB]   + {table.name}.{name}")
+
+
+def _add_indexes(conn, table):
+    # CONCURRENTLY: PostgreSQL builds the index without blocking writes (needs autocommit)
+    concurrently = " CONCURRENTLY" if conn.dialect.name == "postgresql" else ""
+    for ix in table.indexes:
+        cols = ", ".join(c.name for c in ix.columns)
+        unique = "UNIQUE " if ix.unique else ""
+        conn.execute(text(f"CREATE {unique}INDEX{concurrently} IF NOT EXISTS {ix.name} ON {table.name} ({cols})"))
+
+
+# -------------------------
+# migrations
+# -------------------------
+def _m1_requester_fields(conn):
+    # was migrate_add_requester_fields.py
+    # NOT NULL needs a default on ALTER; required at app-level anyway
+    _add_columns(conn, Ticket.__table__, [
+        ("requester_name", " NOT NULL DEFAULT ''"),
+        ("requester_extension", ""),
+    ])
+
+
+def _m2_started_ended(conn):
+    # was db_migrate_add_started_ended.py
+    _add_columns(conn, Ticket.__table__, [("started_at", ""), ("ended_at", "")])
+
+
+def _m3_tracking_columns(conn):
+    _add_columns(conn, Ticket.__table__, [
+        ("assigned_at", ""),
+        ("first_response_at", ""),
+        ("last_status_at", ""),
+        ("spares_requested_at", ""),
+        ("closed_at", ""),
+        ("closed_by", ""),
+        ("error_name", ""),
+    ])
+
+
+def _m4_sla_due_at(conn):
+    _add_columns(conn, Ticket.__table__, [("sla_due_at", "")])
+
+    # old rows -> compute once, batch by id (each batch its own transaction)
+    t = Ticket.__table__
+    upd = t.update().where(t.c.id == bindparam("b_id")).values(sla_due_at=bindparam("b_due"))
+    last_id, total = 0, 0
+    while True:
+        rows = conn.execute(
+            select(t.c.id, t.c.priority, t.c.created_at)
+            .where(t.c.id > last_id, t.c.sla_due_at == None)
+            .order_by(t.c.id)
+            .limit(BACKFILL_BATCH)
+        ).all()
+        if not rows:
+            break
+        params = []
+        for tid, pri, c_at in rows:
+            due = sla_due_at_for(pri, c_at)
+            if due is not None:
+                params.append({"b_id": tid, "b_due": due})
+        if params:
+            conn.execute(upd, params)
+            total += len(params)
+        last_id = rows[-1][0]
+    if total:
+        print(f"[DB]   sla_due_at backfilled: {total}")
+
+
+def _m5_ticket_indexes(conn):
+    # dashboard / KPI / supervisor inbox filters
+    _add_indexes(conn, Ticket.__table__)
+
+
+def _m6_kpi_rollup_and_counter(conn):
+    # kpi_daily_rollup / kpi_rollup_state / counter: created by create_all() in run()
+    pass
+
+
+def _m7_ticket_fts(conn):
+    # SQLite FTS5 search index (no-op on other databases); filled by 8 (needs location_path)
+    ticket_search.create(conn, index=False)
+
+
+def _m8_ticket_location_path(conn):
+    _add_columns(conn, Ticket.__table__, [("location_path", "")])
+    _add_indexes(conn, Ticket.__table__)  # ix_ticket_room
+    n = location_registry.refresh_ticket_paths(conn)
+    if n:
+        print(f"[DB]   location_path backfilled: {n}")
+    if ticket_search.available(conn):
+        print(f"[DB]   ticket_fts indexed: {ticket_search.rebuild(conn)}")
+
+
+def _m9_translation_store(conn):
+    # translation table: created by create_all() in run(); filled by translations.py (offline job)
+    pass
+
+
+# (version, name, fn, online)
+# online=True -> runs on an autocommit connection (CONCURRENTLY / batched backfill)
+MIGRATIONS = [
+    (1, "ticket_requester_fields", _m1_requester_fields, False),
+    (2, "ticket_started_ended", _m2_started_ended, False),
+    (3, "ticket_tracking_columns", _m3_tracking_columns, False),
+    (4, "ticket_sla_due_at", _m4_sla_due_at, True),
+    (5, "ticket_indexes", _m5_ticket_indexes, True),
+    (6, "kpi_rollup_and_counter", _m6_kpi_rollup_and_counter, False),
+    (7, "ticket_fts", _m7_ticket_fts, True),
+    (8, "ticket_location_path", _m8_ticket_location_path, True),
+    (9, "translation_store", _m9_translation_store, False),
+]
+
+LATEST = MIGRATIONS[-1][0]
+
+
+# -------------------------
+# runner
+# -------------------------
+def current_version():
+    """max(schema_version.version), or None when the table doesn't exist yet."""
+    try:
+        with db.engine.connect() as conn:
+            return conn.execute(select(func.max(SchemaVersion.version))).scalar() or 0
+    except Exception:
+        return None
+
+
+def _stamp(version: int, name: str):
+    with db.engine.begin() as conn:
+        conn.execute(SchemaVersion.__table__.insert().values(
+            version=version, name=name, applied_at=datetime.utcnow()
+        ))
+
+
+def run() -> int:
+    """
+    Bring the schema to LATEST (call inside app context).
+    Returns the number of migrations applied.
+    """
+    current = current_version()
+    if current == LATEST:
+        return 0
+
+    fresh = not inspect(db.engine).has_table(Ticket.__table__.name)
+    # new tables (and schema_version itself); never touches existing ones
+    db.create_all()
+
+    if fresh:
+        print("[DB] New database")
+
+    applied = 0
+    for version, name, fn, online in MIGRATIONS:
+        if version <= (current or 0):
+            continue
+        print(f"[DB] Migration {version}: {name}")
+        if online:
+            with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                fn(conn)
+        else:
+            with db.engine.begin() as conn:
+                fn(conn)
+        try:
+            _stamp(version, name)
+        except Exception:
+            pass  # another worker stamped it first
+        applied += 1
+
+    print(f"[DB] Schema at version {LATEST} ({applied} applied)")
+    return applied
+
+
+def main():
+    from app import create_app
+
+    app = create_app()  # runs pending migrations
+    with app.app_context():
+        print(f"[DB] schema_version = {current_version()} / latest {LATEST}")
+        with db.engine.connect() as conn:
+            rows = conn.execute(
+                select(SchemaVersion.version, SchemaVersion.name, SchemaVersion.applied_at)
+                .order_by(SchemaVersion.version)
+            ).all()
+        for version, name, applied_at in rows:
+            print(f"  {version:>3}  {name:<28} {applied_at}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
+from sqlalchemy import event
 from db import db
 
 MAINT_DEPTS = ["mechanical", "civil", "hvac", "electronics", "electrical"]
@@ -56,6 +57,18 @@ class Room(db.Model):
     name = db.Column(db.String(120), nullable=False)
 
 class Ticket(db.Model):
+    # ✅ dashboard / KPI / supervisor inbox filters (created on old DBs by migrations.py)
+    __table_args__ = (
+        db.Index("ix_ticket_created_at", "created_at"),
+        db.Index("ix_ticket_dept_created", "maintenance_dept", "created_at"),
+        db.Index("ix_ticket_status_created", "status", "created_at"),
+        db.Index("ix_ticket_status_closed", "status", "closed_at"),
+        db.Index("ix_ticket_dept_status_closed", "maintenance_dept", "status", "closed_at"),
+        db.Index("ix_ticket_sla_due", "sla_due_at", "ended_at", "status"),
+        db.Index("ix_ticket_updated_at", "updated_at"),
+        db.Index("ix_ticket_room", "room_id"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     ticket_no = db.Column(db.Integer, unique=True, index=True, nullable=False)
 
@@ -97,6 +110,15 @@ class Ticket(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # ✅ created_at + SLA_HOURS[priority] (indexed -> over-SLA is one SQL predicate)
+    sla_due_at = db.Column(db.DateTime, nullable=True)
+
+    # ✅ "Building / Floor / Section / Room" (location_registry.refresh_ticket_paths بعد rename)
+    location_path = db.Column(db.String(500), nullable=True)
+
+    def refresh_sla_due_at(self):
+        self.sla_due_at = sla_due_at_for(self.priority, self.created_at)
+
 class TicketUpdate(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     ticket_id = db.Column(db.Integer, db.ForeignKey("ticket.id"), nullable=False)
@@ -107,6 +129,51 @@ class TicketUpdate(db.Model):
     created_by = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
+# KPI daily rollup: one row per (day, dept, priority, building, status)
+# created facts are counted on the created day, closed facts on the closed day
+class KpiDailyRollup(db.Model):
+    __table_args__ = (
+        db.UniqueConstraint("day", "maintenance_dept", "priority", "building_id", "status",
+                            name="uq_kpi_daily_rollup_key"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False, index=True)
+    maintenance_dept = db.Column(db.String(20), nullable=False)
+    priority = db.Column(db.String(20), nullable=False)
+    building_id = db.Column(db.Integer, nullable=True)
+    status = db.Column(db.String(50), nullable=False)
+
+    created_count = db.Column(db.Integer, default=0, nullable=False)
+    sla_met = db.Column(db.Integer, default=0, nullable=False)
+    sla_breached = db.Column(db.Integer, default=0, nullable=False)
+    closed_count = db.Column(db.Integer, default=0, nullable=False)
+    close_hours_sum = db.Column(db.Float, default=0.0, nullable=False)
+
+class KpiRollupState(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    watermark = db.Column(db.DateTime, nullable=True)  # max(ticket.updated_at) already rolled up
+    rolled_until = db.Column(db.Date, nullable=True)  # first day NOT in the rollup (today at last refresh)
+
+class SchemaVersion(db.Model):
+    # ✅ applied migrations -> migrations.py
+    version = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class Counter(db.Model):
+    # ✅ named counters (ticket_no) -> ticket_numbers.py
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+class Translation(db.Model):
+    # ✅ EN -> AR print translations -> translations.py (ar NULL = queued for the batch job)
+    key = db.Column(db.String(40), primary_key=True)  # sha1(source.strip().lower())
+    source = db.Column(db.Text, nullable=False)
+    ar = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    translated_at = db.Column(db.DateTime, nullable=True)
+
 # SLA hours per priority
 SLA_HOURS = {
     "emergency": 6,
@@ -114,3 +181,19 @@ SLA_HOURS = {
     "medium": 24,
     "low": 48,
 }
+
+
+def sla_due_at_for(priority, created_at):
+    hours = SLA_HOURS.get((priority or "").lower().strip())
+    if not hours or not created_at:
+        return None
+    return created_at + timedelta(hours=hours)
+
+
+# keep sla_due_at current on every insert/update path
+@event.listens_for(Ticket, "before_insert")
+@event.listens_for(Ticket, "before_update")
+def _ticket_sla_due_at(mapper, connection, target):
+    if target.created_at is None:
+        target.created_at = datetime.utcnow()
+    target.refresh_sla_due_at()
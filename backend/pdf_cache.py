@@ -0,0 +1,145 @@
+# pdf_cache.py
+"""
+Content-addressed disk cache for rendered work-order PDFs.
+
+- المفتاح = sha1 لكل اللي بيتطبع (TEMPLATE_VERSION + work_order.build() + الخطوط / الصور)
+  -> أي تعديل في البلاغ أو اسم المكان أو القالب = مفتاح جديد، مفيش invalidation
+- الـ PDF المتخزن فيه TIME_MARK / DATE_MARK مكان وقت الطباعة (form XObject مش مضغوط)؛
+  stamp() بيبدلهم بالوقت الحالي بنفس الطول -> الـ xref offsets سليمة من غير re-render
+- LRU بالحجم: PDF_CACHE_MAX_MB، الـ hit بيعمل touch للـ mtime والأقدم بيتمسح الأول
+- كتابة atomic (tmp + os.replace) -> آمن مع أكتر من worker على نفس الـ dir
+- PDF_CACHE=0 يقفله، PDF_CACHE_DIR يغير المكان
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+ENABLED = os.environ.get("PDF_CACHE", "1").strip() != "0"
+CACHE_DIR = os.environ.get("PDF_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "maintenance_pdf_cache")
+MAX_BYTES = int(float(os.environ.get("PDF_CACHE_MAX_MB", "200")) * 1024 * 1024)
+EVICT_TO = 0.9  # after eviction: <= 90% of MAX_BYTES
+
+# fixed width: "%I:%M %p" = 8 chars, "%d/%m/%Y" = 10 chars
+# '{' never appears in ASCII85 stream data -> only the stamp form matches
+TIME_MARK = "{prtime}"
+DATE_MARK = "{prdate::}"
+
+_lock = threading.Lock()
+_size = None   # bytes on disk (per process estimate, rescanned on eviction)
+_stats = {"hits": 0, "misses": 0, "writes": 0, "evicted": 0}
+
+
+def key(*parts) -> str:
+    raw = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _path(k):
+    return os.path.join(CACHE_DIR, k + ".pdf")
+
+
+def get(k):
+    """Cached PDF bytes (marks not stamped yet) or None; a hit moves it to the LRU front."""
+    if not ENABLED:
+        return None
+    path = _path(k)
+    try:
+        with open(path, "rb") as fh:
+            data = fh.read()
+        os.utime(path)
+    except OSError:
+        _stats["misses"] += 1
+        return None
+    _stats["hits"] += 1
+    return data
+
+
+def put(k, data: bytes):
+    """Best effort: a full / read-only disk just means no caching."""
+    global _size
+    if not ENABLED:
+        return
+    tmp = None
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, _path(k))
+    except OSError:
+        if tmp and os.path.exists(tmp):
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+        return
+    _stats["writes"] += 1
+
+    with _lock:
+        if _size is None:
+            _size = sum(size for _, size, _ in _entries())
+        else:
+            _size += len(data)
+        if _size > MAX_BYTES:
+            _size = _evict()
+
+
+def _entries():
+    """(mtime, size, path) per cached PDF."""
+    out = []
+    try:
+        with os.scandir(CACHE_DIR) as it:
+            for e in it:
+                if e.name.endswith(".pdf"):
+                    try:
+                        st = e.stat()
+                    except OSError:
+                        continue
+                    out.append((st.st_mtime, st.st_size, e.path))
+    except OSError:
+        pass
+    return out
+
+
+def _evict() -> int:
+    """Drop least recently used PDFs until under EVICT_TO * MAX_BYTES; returns the size left."""
+    entries = sorted(_entries())
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in entries:
+        if total <= MAX_BYTES * EVICT_TO:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        _stats["evicted"] += 1
+    return total
+
+
+def _fit(value: str, mark: str) -> bytes:
+    return value.encode("latin-1", "replace")[:len(mark)].ljust(len(mark))
+
+
+def stamp(data: bytes, print_time: str, print_date: str) -> bytes:
+    """Print time / date into a PDF rendered with the marks (same length -> file stays valid)."""
+    return (data
+            .replace(TIME_MARK.encode("ascii"), _fit(print_time, TIME_MARK))
+            .replace(DATE_MARK.encode("ascii"), _fit(print_date, DATE_MARK)))
+
+
+def clear():
+    global _size
+    with _lock:
+        for _, _, path in _entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        _size = 0
+
+
+def stats() -> dict:
+    return dict(_stats, enabled=ENABLED, dir=CACHE_DIR, size=_size)
@@ -0,0 +1,127 @@
+# pdf_pool.py
+"""
+Process pool for large work-order PDF batches.
+
+- ReportLab CPU-bound وماسك الـ GIL -> الدفعة الكبيرة بتتقسم chunks على processes
+  (كل core بيرسم جزء) وبعدين بتتدمج PDF واحد بنفس الترتيب (pypdf)
+- bounded: PDF_POOL_QUEUE chunks بالكتير (شغالة + مستنية) على مستوى الـ process؛
+  لو مليان أكتر من PDF_POOL_WAIT ثانية -> PoolBusy (الـ route بيرجع 503 + Retry-After)
+- الدفعة كلها ليها PDF_POOL_TIMEOUT ثانية؛ بعدها PoolTimeout: الـ futures بتتلغي والـ workers
+  بيتقفلوا (worker معلق مش بيمسك slots ولا process للأبد) والـ pool بيتعمل من جديد
+  بدل ما الـ web workers تتحجز ورا طابور طباعة
+- الدفعات الصغيرة (< PDF_POOL_MIN_BATCH) بتترسم in-process زي الأول
+- PDF_POOL_WORKERS=0 أو pypdf مش متسطب (في requirements.txt) -> مفيش pool خالص
+- spawn: الـ workers مابيورثوش connections / threads بتاعة الـ app
+"""
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from time import monotonic
+
+try:
+    from pypdf import PdfReader, PdfWriter
+except ImportError:  # optional
+    PdfReader = PdfWriter = None
+
+WORKERS = int(os.environ.get("PDF_POOL_WORKERS", str(max(0, min(4, (os.cpu_count() or 1) - 1)))))
+CHUNK = int(os.environ.get("PDF_POOL_CHUNK", "40"))            # min pages per worker task
+MIN_BATCH = int(os.environ.get("PDF_POOL_MIN_BATCH", "80"))    # smaller batches stay in-process
+QUEUE = int(os.environ.get("PDF_POOL_QUEUE", str(max(1, WORKERS) * 4)))
+WAIT = float(os.environ.get("PDF_POOL_WAIT", "2"))             # seconds to wait for queue slots
+TIMEOUT = float(os.environ.get("PDF_POOL_TIMEOUT", "120"))      # seconds for a whole batch
+RETRY_AFTER = 5
+
+_lock = threading.Lock()
+_executor = None
+_slots = threading.BoundedSemaphore(QUEUE)
+
+
+class PoolBusy(Exception):
+    """All queue slots taken (print storm)."""
+
+
+class PoolTimeout(Exception):
+    """Batch not rendered within TIMEOUT (workers were killed)."""
+
+
+def enabled() -> bool:
+    return WORKERS > 0 and PdfWriter is not None
+
+
+def should_use(pages: int) -> bool:
+    return enabled() and pages >= MIN_BATCH
+
+
+def _pool():
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(
+                    max_workers=WORKERS, mp_context=multiprocessing.get_context("spawn")
+                )
+    return _executor
+
+
+def _reset(kill=False):
+    """Drop the pool (next render starts a fresh one); kill=True also terminates busy workers."""
+    global _executor
+    with _lock:
+        ex, _executor = _executor, None
+    if ex is None:
+        return
+    # shutdown() never stops a running task -> a hung worker has to be terminated
+    procs = list((getattr(ex, "_processes", None) or {}).values()) if kill else []
+    ex.shutdown(wait=False, cancel_futures=True)
+    for p in procs:
+        try:
+            p.terminate()
+        except Exception:
+            pass
+
+
+def render(fn, items, *args) -> BytesIO:
+    """
+    fn(chunk, *args) -> PDF bytes (top-level function, picklable args), one task per chunk;
+    pages merged in items order.
+    """
+    # ~one chunk per worker: every chunk PDF carries its own fonts / header image,
+    # so fewer chunks = smaller merged file; never more chunks than QUEUE (a batch must fit)
+    size = max(CHUNK, math.ceil(len(items) / WORKERS), math.ceil(len(items) / QUEUE))
+    chunks = [items[i:i + size] for i in range(0, len(items), size)]
+
+    taken = 0
+    try:
+        for _ in chunks:
+            if not _slots.acquire(timeout=WAIT):
+                raise PoolBusy()
+            taken += 1
+
+        futures = []
+        try:
+            futures = [_pool().submit(fn, chunk, *args) for chunk in chunks]
+            deadline = monotonic() + TIMEOUT
+            parts = [f.result(timeout=max(0.0, deadline - monotonic())) for f in futures]
+        except FutureTimeout:
+            for f in futures:
+                f.cancel()
+            _reset(kill=True)  # stuck worker(s) -> terminated, fresh pool next time
+            raise PoolTimeout() from None
+        except BrokenProcessPool:
+            _reset()  # worker died -> fresh pool next time
+            raise
+    finally:
+        for _ in range(taken):
+            _slots.release()
+
+    writer = PdfWriter()
+    for part in parts:
+        writer.append(PdfReader(BytesIO(part)))
+    buf = BytesIO()
+    writer.write(buf)
+    buf.seek(0)
+    return buf
@@ -0,0 +1,161 @@
+# pdf_resources.py
+"""
+Process-wide ReportLab resources for printing (fonts + images).
+
+- الخطوط بتتسجل في pdfmetrics مرة واحدة في الـ process (TTFont parsing مرة واحدة)
+- الصور (header.png ...) بتتفك مرة وتفضل في الذاكرة، ومعاها الـ image XObject
+  متشفر جاهز (zlib + ASCII85 بـ Python كانوا أغلى حاجة في الـ PDF)؛
+  attach_image() بيحطه في الـ document قبل drawImage فـ reportlab بيعيد استخدامه
+- الـ fast path ده بيعتمد على internals في reportlab (_digester / _doc / _setXObjects)؛
+  الـ version متثبت في requirements.txt، ولو الـ internals دي مش موجودة attach_image
+  بيرجع False و drawImage بيشتغل عادي (بيشفر الصورة في كل PDF، أبطأ بس نفس الناتج)
+- mtime-based: لو ملف خط / صورة اتغير على الديسك بيتحمل تاني في الطلب اللي بعده
+  (os.stat بس في كل طلب)
+- clear(): cold start للـ benchmark
+"""
+import copy
+import os
+import threading
+
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase import pdfdoc, pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+try:  # private: same hash canvas.drawImage() names image XObjects with
+    from reportlab.pdfgen.canvas import _digester
+except ImportError:
+    _digester = None
+
+STATIC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "static"))
+
+# (family, regular, bold) in backend/static/fonts, first complete pair wins
+FONT_CANDIDATES = (
+    ("Cairo", "Cairo-Regular.ttf", "Cairo-Bold.ttf"),
+    ("Amiri", "Amiri-Regular.ttf", "Amiri-Bold.ttf"),
+)
+FALLBACK_FONTS = ("Helvetica", "Helvetica-Bold")
+
+_lock = threading.Lock()
+_fonts = None   # (key, (regular, bold))
+_images = {}    # path -> (mtime, CachedImage)
+_stats = {"font_loads": 0, "font_hits": 0, "image_loads": 0, "image_hits": 0}
+
+
+class CachedImage(ImageReader):
+    """ImageReader + its encoded XObject (built once; drawn with mask=None; None = no fast path)."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.xobject_name = self.xobject = None
+        if _digester is None:
+            return
+        try:
+            # same name canvas.drawImage() computes for (reader, mask=None)
+            name = _digester(self.getRGBData() + b"None")
+            xobject = pdfdoc.PDFImageXObject(name, self, mask=None)
+            xobject.name = name
+        except Exception:
+            return
+        self.xobject_name, self.xobject = name, xobject
+
+
+def attach_image(c, img) -> bool:
+    """
+    Register img's prebuilt XObject in c's document -> c.drawImage(img, ...) skips re-encoding.
+    False (nothing touched) when img has no XObject or this reportlab lacks the internals.
+    """
+    if getattr(img, "xobject", None) is None:
+        return False
+    doc = getattr(c, "_doc", None)
+    if not (hasattr(c, "_setXObjects") and isinstance(getattr(doc, "idToObject", None), dict)
+            and all(hasattr(doc, a) for a in ("getXObjectName", "Reference", "addForm"))):
+        return False
+    reg_name = doc.getXObjectName(img.xobject_name)
+    if doc.idToObject.get(reg_name) is None:
+        obj = copy.copy(img.xobject)
+        c._setXObjects(obj)
+        doc.Reference(obj, reg_name)
+        doc.addForm(img.xobject_name, obj)
+    return True
+
+
+def static_path(*parts):
+    return os.path.join(STATIC_DIR, *parts)
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _font_key():
+    key = []
+    for family, reg, bold in FONT_CANDIDATES:
+        reg, bold = static_path("fonts", reg), static_path("fonts", bold)
+        key.append((family, reg, bold, _mtime(reg), _mtime(bold)))
+    return tuple(key)
+
+
+def fonts():
+    """(regular, bold) font names, registered once per process (Helvetica when no TTF pair)."""
+    global _fonts
+    key = _font_key()
+    cached = _fonts
+    if cached is not None and cached[0] == key:
+        _stats["font_hits"] += 1
+        return cached[1]
+
+    with _lock:
+        if _fonts is None or _fonts[0] != key:
+            names = FALLBACK_FONTS
+            for family, reg, bold, reg_m, bold_m in key:
+                if reg_m is not None and bold_m is not None:
+                    pdfmetrics.registerFont(TTFont(family, reg))
+                    pdfmetrics.registerFont(TTFont(family + "-B", bold))
+                    names = (family, family + "-B")
+                    break
+            _fonts = (key, names)
+            _stats["font_loads"] += 1
+        return _fonts[1]
+
+
+def image(*parts):
+    """CachedImage for static/<parts> (None if missing / unreadable), reloaded when mtime changes."""
+    path = static_path(*parts)
+    mtime = _mtime(path)
+    if mtime is None:
+        return None
+
+    entry = _images.get(path)
+    if entry is not None and entry[0] == mtime:
+        _stats["image_hits"] += 1
+        return entry[1]
+
+    with _lock:
+        entry = _images.get(path)
+        if entry is None or entry[0] != mtime:
+            try:
+                reader = CachedImage(path)
+            except Exception:
+                reader = None
+            _images[path] = entry = (mtime, reader)
+            _stats["image_loads"] += 1
+        return entry[1]
+
+
+def files_key(*images):
+    """Font files + static images (name, mtime) -> part of a rendered PDF's cache key."""
+    return _font_key() + tuple((name, _mtime(static_path(name))) for name in images)
+
+
+def clear():
+    global _fonts
+    with _lock:
+        _fonts = None
+        _images.clear()
+
+
+def stats() -> dict:
+    return dict(_stats, images=len(_images))
@@ -0,0 +1,145 @@
+# sqlite_profile.py
+"""
+SQLite performance profile applied on every pooled connection.
+
+- WAL: القراءات (dashboard polls) ماتستناش الكتابة (ticket updates)
+- synchronous=NORMAL + mmap + cache + busy_timeout + temp_store
+- كل قيمة ممكن تتغير من env (SQLITE_JOURNAL_MODE, SQLITE_MMAP_SIZE, ...)
+- WAL + mmap ممنوعين على network share / مجلد متزامن (Google Drive / OneDrive / Dropbox):
+  الـ -wal و -shm بيحتاجوا shared memory على نفس الجهاز والمزامنة بتبوظ الملفات
+  -> في الحالة دي بنرجع لـ journal_mode=DELETE و mmap_size=0
+- Backup: مع WAL آخر commits بتكون في maintenance.db-wal لحد الـ checkpoint
+  -> نسخ / zip لملف الـ .db لوحده وهو شغال مش backup سليم (ناقص ومتقطع نص كتابة)؛
+  استخدم backup_db.py (sqlite3 backup API) زي backup_weekly.bat
+"""
+import os
+import sys
+
+from sqlalchemy import event
+
+DEFAULTS = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "mmap_size": 256 * 1024 * 1024,  # bytes
+    "cache_size": -64 * 1024,        # negative = KiB (64 MB)
+    "busy_timeout": 5000,            # ms
+    "temp_store": "memory",
+}
+
+CHOICES = {
+    "journal_mode": ("delete", "truncate", "persist", "memory", "wal", "off"),
+    "synchronous": ("off", "normal", "full", "extra"),
+    "temp_store": ("default", "file", "memory"),
+}
+
+# folders that get copied around by sync clients (case-insensitive substring match)
+SYNCED_MARKERS = (
+    "google drive", "googledrive", "my drive", "other computers",
+    "onedrive", "dropbox", "icloud", "box sync", "nextcloud", "owncloud",
+)
+
+NETWORK_FS = ("nfs", "nfs4", "cifs", "smb", "smbfs", "smb3", "9p", "afs", "sshfs", "fuse.sshfs", "davfs", "fuse.rclone")
+
+
+def _env(key: str, default):
+    value = os.environ.get("SQLITE_" + key.upper(), "").strip()
+    if not value:
+        return default
+    try:
+        value = int(value) if isinstance(default, int) else value.lower()
+    except ValueError:
+        value = None
+    if value is None or (key in CHOICES and value not in CHOICES[key]):
+        print(f"[DB] Ignoring invalid SQLITE_{key.upper()}={os.environ.get('SQLITE_' + key.upper())!r}")
+        return default
+    return value
+
+
+def _windows_drive_is_remote(path: str) -> bool:
+    try:
+        import ctypes
+        drive = os.path.splitdrive(os.path.abspath(path))[0]
+        if not drive:
+            return False
+        DRIVE_REMOTE = 4
+        return ctypes.windll.kernel32.GetDriveTypeW(drive + "\\") == DRIVE_REMOTE
+    except Exception:
+        return False
+
+
+def _linux_mount_fstype(path: str):
+    try:
+        path = os.path.realpath(path)
+        best, fstype = "", None
+        with open("/proc/mounts", encoding="utf-8") as fh:
+            for line in fh:
+                parts = line.split()
+                if len(parts) < 3:
+                    continue
+                mnt = parts[1].replace("\\040", " ")
+                if (path == mnt or path.startswith(mnt.rstrip("/") + "/")) and len(mnt) > len(best):
+                    best, fstype = mnt, parts[2]
+        return fstype
+    except Exception:
+        return None
+
+
+def wal_unsafe_reason(db_path: str):
+    """Why WAL must not be used for db_path (network / synced folder), or None."""
+    if not db_path:
+        return None
+
+    raw = db_path.replace("/", "\\")
+    if raw.startswith("\\\\"):
+        return "UNC network path"
+
+    lowered = os.path.abspath(db_path).lower()
+    for marker in SYNCED_MARKERS:
+        if marker in lowered:
+            return f"synced folder ({marker})"
+
+    if sys.platform.startswith("win"):
+        if _windows_drive_is_remote(db_path):
+            return "network drive"
+    else:
+        fstype = _linux_mount_fstype(os.path.dirname(os.path.abspath(db_path)))
+        if fstype and (fstype in NETWORK_FS or fstype.startswith("fuse.")):
+            return f"network filesystem ({fstype})"
+
+    return None
+
+
+def build_profile(db_path: str) -> dict:
+    profile = {key: _env(key, default) for key, default in DEFAULTS.items()}
+
+    reason = wal_unsafe_reason(db_path)
+    if reason:
+        if profile["journal_mode"] == "wal":
+            print(f"[DB] WAL refused on {reason}: {db_path} -> journal_mode=DELETE")
+            profile["journal_mode"] = "delete"
+        profile["mmap_size"] = 0
+    return profile
+
+
+def install(engine, profile: dict):
+    """Apply profile on every new DBAPI connection of engine."""
+
+    @event.listens_for(engine, "connect")
+    def _apply(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        try:
+            # busy_timeout first: journal_mode=WAL needs a lock the first time
+            cur.execute(f"PRAGMA busy_timeout = {int(profile['busy_timeout'])}")
+            cur.execute(f"PRAGMA journal_mode = {profile['journal_mode']}")
+            cur.execute(f"PRAGMA synchronous = {profile['synchronous']}")
+            cur.execute(f"PRAGMA mmap_size = {int(profile['mmap_size'])}")
+            cur.execute(f"PRAGMA cache_size = {int(profile['cache_size'])}")
+            cur.execute(f"PRAGMA temp_store = {profile['temp_store']}")
+        finally:
+            cur.close()
+
+    return _apply
+
+
+def describe(profile: dict) -> str:
+    return " ".join(f"{k}={v}" for k, v in profile.items())
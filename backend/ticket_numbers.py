@@ -0,0 +1,96 @@
+# ticket_numbers.py
+"""
+Ticket number allocation from the `counter` table (instead of MAX(ticket_no)+1).
+
+- UPDATE counter SET value = value + 1 جوه transaction الإنشاء نفسها:
+  الـ UPDATE بياخد الـ write/row lock فمفيش رقمين زي بعض، ولو حصل rollback الرقم بيرجع
+- TICKET_NO_BLOCK > 1: كل process بتحجز block أرقام مرة واحدة (transaction مستقلة)
+  وتوزعها من الذاكرة. ممكن يبقى فيه فجوات (restart / rollback) بس مفيش تكرار
+  الحجز بيتم على connection خاص (NullPool) عشان مايستناش الـ pool اللي الـ requests ماسكاه
+"""
+import os
+import threading
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.pool import NullPool
+
+from db import db
+from models import Counter, Ticket
+
+NAME = "ticket_no"
+BLOCK = max(1, int(os.environ.get("TICKET_NO_BLOCK", "1")))
+
+_lock = threading.Lock()
+_synced = False
+_block_engine = None
+_next = 0
+_end = 0  # exclusive
+
+
+def sync():
+    """
+    counter >= max(ticket_no): first run on an old DB, or rows inserted
+    directly by old scripts. Safe to call from several processes.
+    """
+    global _synced
+
+    table = Counter.__table__
+    top = db.session.query(func.max(Ticket.ticket_no)).scalar() or 0
+
+    if db.session.query(Counter.value).filter(Counter.name == NAME).scalar() is None:
+        try:
+            db.session.execute(table.insert().values(name=NAME, value=top))
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()  # another process created it first
+
+    db.session.execute(
+        table.update()
+        .where(table.c.name == NAME, table.c.value < top)
+        .values(value=top)
+    )
+    db.session.commit()
+    _synced = True
+
+
+def _reserve(conn, n: int) -> int:
+    """Bump the counter by n on conn (session or connection); returns the last reserved number."""
+    table = Counter.__table__
+    conn.execute(
+        table.update()
+        .where(table.c.name == NAME)
+        .values(value=table.c.value + n)
+    )
+    # same transaction -> we still hold the lock, so this is our value
+    row = conn.execute(table.select().where(table.c.name == NAME)).first()
+    if row is None:
+        raise RuntimeError("ticket_no counter row is missing")
+    return int(row.value)
+
+
+def next_ticket_no() -> int:
+    """
+    Next ticket number. With BLOCK == 1 the bump is part of the caller's
+    session transaction (commit/rollback together with the INSERT).
+    """
+    global _next, _end, _block_engine
+
+    if not _synced:
+        with _lock:
+            if not _synced:
+                sync()
+
+    if BLOCK <= 1:
+        return _reserve(db.session, 1)
+
+    with _lock:
+        if _next >= _end:
+            if _block_engine is None:
+                _block_engine = create_engine(db.engine.url, poolclass=NullPool)
+            with _block_engine.begin() as conn:
+                last = _reserve(conn, BLOCK)
+            _next, _end = last - BLOCK + 1, last + 1
+        no = _next
+        _next += 1
+        return no
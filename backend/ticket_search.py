@@ -0,0 +1,209 @@
+# ticket_search.py
+"""
+Full-text search for tickets (SQLite FTS5: ticket_fts, rowid = ticket.id).
+
+- الأعمدة: ticket_no / requester_name / title / description / error_name / location
+  (location = Ticket.location_path -> مفيش joins ولا registry وقت البحث)
+- Arabic-aware: normalize() بتشيل التشكيل والتطويل وبتوحد أ/إ/آ -> ا ، ة -> ه ، ى -> ي
+  على النص المخزن وعلى كلمة البحث (unicode61 لوحده بيقطع الكلمة عند التشكيل)،
+  و"ال" / "وال" / "بال" ... بتتشال من أول الكلمة (الطوارئ == طوارئ)
+- prefix: كل كلمة بتتحول لـ "token"* (prefix index 2,3 حروف)
+- ranked: bm25 (ranked()) للـ supervisor inbox
+- sync: ORM events على Ticket (insert / update للحقول دي بس) + reindex_rooms() بعد rename / delete
+- PostgreSQL / SQLite من غير FTS5 / SEARCH_FTS=0 -> available() = False والـ callers
+  بيرجعوا لـ ILIKE
+"""
+import os
+import re
+
+from sqlalchemy import Integer, column, event, func, inspect, literal_column, table, text
+from sqlalchemy.engine import Connection
+
+from models import Ticket
+
+TABLE = "ticket_fts"
+ENABLED = os.environ.get("SEARCH_FTS", "1").strip() != "0"
+REBUILD_BATCH = 5000
+
+FIELDS = ("ticket_no", "requester_name", "title", "description", "error_name", "location_path")
+
+CREATE_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+    "ticket_no, requester_name, title, description, error_name, location, "
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+)
+
+_AR_DIACRITICS = re.compile("[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]")  # tashkeel + tatweel
+_AR_FOLD = str.maketrans({"أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا", "ة": "ه", "ى": "ي", "ؤ": "و", "ئ": "ي"})
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+_AR_ARTICLES = ("وال", "بال", "فال", "كال", "لل", "ال")
+
+_available = {}  # engine url -> bool
+
+
+def normalize(value) -> str:
+    if value is None:
+        return ""
+    s = _AR_DIACRITICS.sub("", str(value))
+    return s.translate(_AR_FOLD).lower()
+
+
+def _has_table(conn) -> bool:
+    return conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :n"), {"n": TABLE}
+    ).first() is not None
+
+
+def available(bind) -> bool:
+    """FTS table present on this database (engine or connection; checked once per engine)."""
+    if not ENABLED or bind.dialect.name != "sqlite":
+        return False
+    engine = getattr(bind, "engine", bind)
+    key = str(engine.url)
+    if key not in _available:
+        if isinstance(bind, Connection):
+            _available[key] = _has_table(bind)
+        else:
+            with engine.connect() as conn:
+                _available[key] = _has_table(conn)
+    return _available[key]
+
+
+def _strip_article(tok: str) -> str:
+    for art in _AR_ARTICLES:
+        if tok.startswith(art) and len(tok) - len(art) >= 2:
+            return tok[len(art):]
+    return tok
+
+
+def index_text(value) -> str:
+    """normalize() + article-less forms of Arabic words (so prefix search hits both)."""
+    s = normalize(value)
+    extra = [stem for stem in (_strip_article(tok) for tok in _TOKEN.findall(s)) if stem not in s.split()]
+    return s + (" " + " ".join(extra) if extra else "")
+
+
+def match_expr(q: str):
+    """User text -> FTS5 MATCH expression (AND of prefix terms), or None."""
+    tokens = [_strip_article(tok) for tok in _TOKEN.findall(normalize(q))]
+    if not tokens:
+        return None
+    return " ".join(f'"{tok}"*' for tok in tokens)
+
+
+def _row(tid, ticket_no, requester_name, title, description, error_name, location_path) -> dict:
+    return {
+        "id": tid,
+        "ticket_no": str(ticket_no or ""),
+        "requester_name": index_text(requester_name),
+        "title": index_text(title),
+        "description": index_text(description),
+        "error_name": index_text(error_name),
+        "location": index_text(location_path),
+    }
+
+
+def _write(conn, rows):
+    if not rows:
+        return
+    conn.execute(text(f"DELETE FROM {TABLE} WHERE rowid = :id"), [{"id": r["id"]} for r in rows])
+    conn.execute(
+        text(f"INSERT INTO {TABLE} (rowid, ticket_no, requester_name, title, description, error_name, location) "
+             "VALUES (:id, :ticket_no, :requester_name, :title, :description, :error_name, :location)"),
+        rows,
+    )
+
+
+_SELECT_COLS = "id, ticket_no, requester_name, title, description, error_name, location_path"
+
+
+def rebuild(conn, where: str = "", params=None) -> int:
+    """(Re)index tickets matching where (all when empty), in id batches."""
+    last_id, total = 0, 0
+    cond = f" AND ({where})" if where else ""
+    while True:
+        rows = conn.execute(
+            text(f"SELECT {_SELECT_COLS} FROM ticket WHERE id > :last{cond} ORDER BY id LIMIT :n"),
+            dict(params or {}, last=last_id, n=REBUILD_BATCH),
+        ).all()
+        if not rows:
+            break
+        _write(conn, [_row(*r) for r in rows])
+        total += len(rows)
+        last_id = rows[-1][0]
+    return total
+
+
+def create(conn, index: bool = True) -> int:
+    """Create ticket_fts (SQLite only), and index every ticket unless index=False. Used by migrations.py."""
+    if conn.dialect.name != "sqlite" or not ENABLED:
+        return 0
+    conn.execute(text(CREATE_SQL))
+    _available.pop(str(conn.engine.url), None)
+    return rebuild(conn) if index else 0
+
+
+def reindex_rooms(conn, room_ids) -> int:
+    """
+    Refresh tickets in room_ids (after location_registry.refresh_ticket_paths).
+    room_ids from location_registry.rooms_under() before a delete -> deleted rooms still match.
+    """
+    if not available(conn):
+        return 0
+    room_ids, total = list(room_ids), 0
+    for i in range(0, len(room_ids), 500):
+        chunk = room_ids[i:i + 500]
+        marks = ", ".join(f":r{n}" for n in range(len(chunk)))
+        total += rebuild(conn, f"room_id IN ({marks})", {f"r{n}": v for n, v in enumerate(chunk)})
+    return total
+
+
+_fts = table(TABLE, column("rowid", Integer))
+
+
+def ids_subquery(q: str):
+    """SELECT rowid .. MATCH (for Ticket.id.in_()), or None when q has no terms."""
+    expr = match_expr(q)
+    if expr is None:
+        return None
+    return text(f"SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH :fts_q")\
+        .bindparams(fts_q=expr).columns(column("rowid", Integer))
+
+
+def ranked(query, q: str):
+    """Ticket query joined to the index, filtered by q, best match (bm25) first; None when q has no terms."""
+    expr = match_expr(q)
+    if expr is None:
+        return None
+    return query.join(_fts, _fts.c.rowid == Ticket.id)\
+                .filter(literal_column(TABLE).op("MATCH")(expr))\
+                .order_by(func.bm25(literal_column(TABLE)), Ticket.created_at.desc())
+
+
+# -------------------------
+# sync with Ticket (same transaction as the ticket write)
+# -------------------------
+def _ticket_row(t: Ticket) -> dict:
+    return _row(t.id, t.ticket_no, t.requester_name, t.title, t.description, t.error_name, t.location_path)
+
+
+@event.listens_for(Ticket, "after_insert")
+def _ticket_inserted(mapper, connection, target):
+    if available(connection):
+        _write(connection, [_ticket_row(target)])
+
+
+@event.listens_for(Ticket, "after_update")
+def _ticket_updated(mapper, connection, target):
+    if not available(connection):
+        return
+    state = inspect(target)
+    # status / timestamps changes don't touch the index
+    if any(state.attrs[f].history.has_changes() for f in FIELDS):
+        _write(connection, [_ticket_row(target)])
+
+
+@event.listens_for(Ticket, "after_delete")
+def _ticket_deleted(mapper, connection, target):
+    if available(connection):
+        connection.execute(text(f"DELETE FROM {TABLE} WHERE rowid = :id"), {"id": target.id})
@@ -0,0 +1,159 @@
+# translations.py
+"""
+Persistent EN -> AR translation store for prints (Translation table).
+
+- الطباعة بتعمل dict lookup بس: الجدول بيتحمل مرة في الذاكرة وبيتعمله reload
+  كل TRANSLATIONS_MAX_AGE ثانية (عشان كل الـ workers يشوفوا شغل الـ job)
+- نص مش معروف -> enqueue(): صف بـ ar = NULL (insert واحد لكل نص)، مفيش Argos في الـ request
+- fill() = الـ batch job (offline / cron): أسماء الأماكن + error_name + MAINT_DEPTS / PRIORITIES /
+  STATUSES + أي حاجة في الطابور -> translator.to_ar (Argos) وبتتخزن
+- من غير Argos + موديل EN->AR الـ job بيجمع الطابور بس، والطباعة بتستخدم AR_MAP / النص نفسه
+
+Run:
+    python translations.py              (مرة واحدة)
+    python translations.py --watch 60   (كل 60 ثانية)
+"""
+import hashlib
+import os
+import sys
+import threading
+from datetime import datetime
+from time import monotonic, sleep
+
+from sqlalchemy import bindparam, exc, select
+
+from db import db
+from models import (MAINT_DEPTS, PRIORITIES, STATUSES, Building, Floor, HospitalSection, Room,
+                    Ticket, Translation)
+
+MAX_AGE = int(os.environ.get("TRANSLATIONS_MAX_AGE", "300"))  # seconds
+BATCH = 200  # rows translated per commit in fill()
+
+_lock = threading.Lock()
+_loaded_at = None
+_map = {}        # key -> ar (None = queued)
+_queued = set()  # keys this process already inserted
+
+
+def key(text: str) -> str:
+    return hashlib.sha1(text.strip().lower().encode("utf-8")).hexdigest()
+
+
+def invalidate():
+    global _loaded_at
+    with _lock:
+        _loaded_at = None
+
+
+def _map_current():
+    global _loaded_at, _map
+    if _loaded_at is not None and (monotonic() - _loaded_at) < MAX_AGE:
+        return _map
+
+    with _lock:
+        if _loaded_at is None or (monotonic() - _loaded_at) >= MAX_AGE:
+            _map = dict(Translation.query.with_entities(Translation.key, Translation.ar).all())
+            _loaded_at = monotonic()
+        return _map
+
+
+def lookup(text: str):
+    """Stored Arabic for text, or None (unknown or still queued)."""
+    return _map_current().get(key(text))
+
+
+def enqueue(text: str) -> bool:
+    """Queue text for the batch job (no-op when known / queued). Never raises (print path)."""
+    k = key(text)
+    if k in _queued or k in _map_current():
+        return False
+    _queued.add(k)
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(Translation.__table__.insert().values(
+                key=k, source=text.strip(), created_at=datetime.utcnow()))
+    except exc.IntegrityError:
+        return False  # another worker queued it first
+    except Exception:
+        _queued.discard(k)
+        return False
+    return True
+
+
+def sources():
+    """Strings every print can show: location names, error names, enum values."""
+    out = set(MAINT_DEPTS) | set(PRIORITIES) | set(STATUSES)
+    for model in (Building, Floor, HospitalSection, Room):
+        out.update(n for (n,) in db.session.execute(select(model.name).distinct()) if n)
+    out.update(n for (n,) in db.session.execute(select(Ticket.error_name).distinct()) if n)
+    return {s.strip() for s in out if s and s.strip()}
+
+
+def fill(translate=None) -> dict:
+    """
+    Batch job: queue sources() that aren't stored yet, then translate the queue.
+    translate defaults to translator.to_ar (skipped when Argos / the EN->AR model is missing).
+    """
+    t = Translation.__table__
+    known = {k for (k,) in db.session.execute(select(t.c.key))}
+    now = datetime.utcnow()
+    new = {}
+    for s in sources():
+        k = key(s)
+        if k not in known:
+            new.setdefault(k, s)
+    if new:
+        db.session.execute(t.insert(), [{"key": k, "source": s, "created_at": now} for k, s in new.items()])
+        db.session.commit()
+
+    pending = db.session.execute(select(t.c.key, t.c.source).where(t.c.ar == None)).all()
+    stats = {"queued": len(new), "pending": len(pending), "translated": 0}
+
+    if translate is None:
+        import translator
+        if not translator.available():
+            stats["engine"] = None
+            return stats
+        translate = translator.to_ar
+
+    for i in range(0, len(pending), BATCH):
+        rows = []
+        for k, source in pending[i:i + BATCH]:
+            try:
+                rows.append({"b_key": k, "b_ar": translate(source)})
+            except Exception as e:
+                print(f"[TR] failed: {source!r}: {e}")
+        if rows:
+            db.session.execute(
+                t.update().where(t.c.key == bindparam("b_key"))
+                .values(ar=bindparam("b_ar"), translated_at=datetime.utcnow()),
+                rows,
+            )
+            db.session.commit()
+            stats["translated"] += len(rows)
+
+    invalidate()
+    return stats
+
+
+def main():
+    from app import create_app
+
+    watch = None
+    if "--watch" in sys.argv:
+        watch = int(sys.argv[sys.argv.index("--watch") + 1])
+
+    app = create_app()
+    with app.app_context():
+        while True:
+            stats = fill()
+            print(f"[TR] {stats}")
+            if stats.get("engine", True) is None:
+                print("[TR] no EN->AR engine (pip install argostranslate + en->ar model); strings stay queued")
+            if not watch:
+                break
+            sleep(watch)
+
+
+if __name__ == "__main__":
+    main()
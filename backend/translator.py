@@ -1,6 +1,18 @@
 # translator.py
+# ✅ Argos runs only in the offline job (translations.py); prints read the translation table
 from functools import lru_cache
 
+
+def available() -> bool:
+    """Argos Translate installed with an EN->AR model."""
+    try:
+        import argostranslate.translate as argos_translate
+        langs = {lang.code: lang for lang in argos_translate.get_installed_languages()}
+        return "en" in langs and "ar" in langs and langs["en"].get_translation(langs["ar"]) is not None
+    except Exception:
+        return False
+
+
 @lru_cache(maxsize=5000)
 def to_ar(text: str) -> str:
     """
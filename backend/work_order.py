@@ -0,0 +1,157 @@
+# work_order.py
+"""
+Work-order view model shared by every print path (printing_html / printing_pdf / app fallback).
+
+- build(t, user): dict واحد فيه القيم بالإنجليزي + العربي (*_ar) -> الـ HTML والـ PDF بيطبعوا نفس الحاجة
+- البلاغ بـ query واحدة؛ الأماكن من location_registry (في الذاكرة، مفيش queries)
+- to_ar(): AR_MAP ثم جدول الترجمة (translations.py) ثم كلمة كلمة من AR_MAP -> dict lookups بس؛
+  النص المش معروف بيتحط في طابور الـ batch job (Argos مش في الـ request)، لقيم QUEUED بس
+  (أسماء أماكن / error_name / enums = نفس translations.sources())؛ الـ description نص حر
+  -> lookup بس، مفيش INSERT في الـ GET ولا جدول بيكبر مع كل بلاغ
+- القيم plain (str / int) -> picklable لـ pdf_pool وتنفع مفتاح لـ pdf_cache
+"""
+from datetime import datetime
+
+from flask import abort, render_template
+
+from models import Ticket
+import location_registry
+import translations
+
+# قاموس ترجمة ديناميكي (زوده وقت ما تحب)
+AR_MAP = {
+    "main building": "المبنى الرئيسي",
+    "basement": "القبو",
+    "ground": "الأرضي",
+    "ground floor": "الأرضي",
+    "first floor": "الطابق الأول",
+    "second floor": "الطابق الثاني",
+    "third floor": "الطابق الثالث",
+    "fourth floor": "الطابق الرابع",
+
+    "hvac": "قسم التكييف",
+    "mechanical": "قسم الميكانيكا",
+    "civil": "قسم المدني",
+    "electronics": "قسم الإلكترونيات",
+    "electrical": "قسم الكهرباء",
+
+    "new": "جديد",
+    "processing": "تحت الإجراء",
+    "waiting": "انتظار",
+    "needs spare parts": "مطلوب قطع غيار",
+    "needs_spares": "مطلوب قطع غيار",
+    "executed": "تم التنفيذ",
+    "cancelled": "ملغي",
+    "closed": "تم الإغلاق",
+
+    "high": "مرتفع",
+    "medium": "متوسط",
+    "low": "منخفض",
+    "emergency": "طارئ",
+    "other": "أخرى",
+}
+
+# fields printed in English + Arabic (value_ar = to_ar(value))
+TRANSLATED = ("building", "floor", "section", "room", "maintenance_dept",
+              "error_name", "priority", "status", "description")
+# values unknown text gets queued for (bounded set, same scope as translations.sources())
+QUEUED = frozenset(TRANSLATED) - {"description"}
+
+
+def _is_arabic(s: str) -> bool:
+    return any('\u0600' <= ch <= '\u06FF' for ch in s)
+
+
+def to_ar(text, queue=True) -> str:
+    """Arabic for text; queue=False -> never written to the translation store."""
+    if text is None:
+        return ""
+    s = str(text).strip()
+    if not s:
+        return ""
+    low = s.lower()
+    if low in AR_MAP:
+        return AR_MAP[low]
+    if _is_arabic(s):
+        return s
+    try:
+        out = translations.lookup(s)
+        if out is None and queue:
+            translations.enqueue(s)
+    except Exception:
+        out = None  # store not reachable -> still print
+    if out:
+        return out
+    fixed = []
+    for p in s.split():
+        k = p.strip(" ,./\\-_:;()[]{}").lower()
+        fixed.append(AR_MAP.get(k, p))
+    return " ".join(fixed)
+
+
+def _attr(obj, name, default=None):
+    if obj is None:
+        return default
+    return getattr(obj, name, default)
+
+
+def _str(x) -> str:
+    return "" if x is None else str(x)
+
+
+def print_stamp():
+    now = datetime.now()
+    return now.strftime("%I:%M %p"), now.strftime("%d/%m/%Y")
+
+
+def build(t, user=None) -> dict:
+    """Everything a work order prints for ticket t (user = who prints: User Name / Emp No)."""
+    building, floor, section, room = location_registry.for_ticket(t)
+
+    # ---- Requester fields (support both names) ----
+    requester_name = _attr(t, "requester_name") or _attr(t, "caller_name", "") or ""
+    requester_extension = _attr(t, "requester_extension")
+    if requester_extension is None:
+        requester_extension = _attr(t, "requester_ext")
+
+    # ---- Ticket No ----
+    ticket_no = None
+    for name in ("ticket_no", "ticket_number", "ticket_id", "id"):
+        ticket_no = _attr(t, name)
+        if ticket_no is not None:
+            break
+
+    created_at = _attr(t, "created_at")
+
+    wo = {
+        "ticket_id": _attr(t, "id"),
+        "ticket_no": _str(ticket_no),
+        "requester_name": requester_name,
+        "requester_extension": _str(requester_extension),
+        "job_time": created_at.strftime("%I:%M %p") if created_at else "",
+        "job_date": created_at.strftime("%d/%m/%Y") if created_at else "",
+        "user_name": _str(_attr(user, "username")),
+        "emp_no": _str(_attr(user, "emp_no")),
+        "building": _attr(building, "name", ""),
+        "floor": _attr(floor, "name", ""),
+        "section": _attr(section, "name", ""),
+        "room": _attr(room, "name", ""),
+        "maintenance_dept": _str(_attr(t, "maintenance_dept")),
+        "error_name": _str(_attr(t, "error_name")),
+        "priority": _str(_attr(t, "priority")),
+        "status": _str(_attr(t, "status")),
+        "description": _str(_attr(t, "description")),
+    }
+    for name in TRANSLATED:
+        wo[name + "_ar"] = to_ar(wo[name], queue=name in QUEUED)
+    return wo
+
+
+def render_html(ticket_id: int, user=None):
+    """print_work_order.html for one ticket (404 if missing)."""
+    t = Ticket.query.get(ticket_id)
+    if t is None:
+        abort(404)
+    now_time, now_date = print_stamp()
+    return render_template("print_work_order.html", wo=build(t, user),
+                           now_time=now_time, now_date=now_date)
@@ -23,6 +23,7 @@ REM ===============================
 for /f %%i in ('powershell -NoProfile -Command "Get-Date -Format yyyy-MM-dd"') do set "DATESTR=%%i"
 
 set "ZIP_PATH=%BACKUP_DIR%\maintenance_%DATESTR%.zip"
+set "SNAP_PATH=%BACKUP_DIR%\maintenance_%DATESTR%.db"
 
 REM ===============================
 REM Validate DB exists
@@ -36,16 +37,47 @@ if not exist "%DB_PATH%" (
   exit /b 1
 )
 
+REM ===============================
+REM Python (backend venv first)
+REM ===============================
+set "PYEXE="
+if exist "%BASE_DIR%backend\.venv\Scripts\python.exe" set "PYEXE="%BASE_DIR%backend\.venv\Scripts\python.exe""
+if not defined PYEXE (
+  where python >nul 2>nul && set "PYEXE=python"
+)
+if not defined PYEXE (
+  where py >nul 2>nul && set "PYEXE=py -3"
+)
+if not defined PYEXE (
+  echo ERROR: Python not found. Please install Python 3.x first.
+  pause
+  exit /b 1
+)
+
+REM ===============================
+REM Consistent snapshot (sqlite3 backup API)
+REM WAL mode: recent commits live in maintenance.db-wal,
+REM so zipping maintenance.db alone is NOT a valid backup
+REM ===============================
+%PYEXE% "%BASE_DIR%backend\backup_db.py" "%DB_PATH%" "%SNAP_PATH%"
+
+if errorlevel 1 (
+  echo ERROR: Backup failed.
+  pause
+  exit /b 1
+)
+
 REM ===============================
 REM Create ZIP (Compress-Archive)
 REM ===============================
-powershell -NoProfile -Command "Compress-Archive -LiteralPath '%DB_PATH%' -DestinationPath '%ZIP_PATH%' -Force"
+powershell -NoProfile -Command "Compress-Archive -LiteralPath '%SNAP_PATH%' -DestinationPath '%ZIP_PATH%' -Force"
 
 if errorlevel 1 (
   echo ERROR: Backup failed.
   pause
   exit /b 1
 )
+del "%SNAP_PATH%"
 
 echo ====================================
 echo Backup created successfully: